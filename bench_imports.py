@@ -0,0 +1,74 @@
+"""Import-time benchmark for the helper modules in with-dspy/ and sammo-prompting/.
+
+Each module is imported in a fresh interpreter (so nothing is warm) and must
+come in under the time budget without dragging in any of the heavy
+dependencies. Exits non-zero when either check fails, so it can guard CI or a
+pre-commit hook:
+
+    python bench_imports.py --budget-ms 50
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# (directory the module lives in, module name)
+MODULES = [
+    ("with-dspy", "jokes"),
+    ("sammo-prompting", "transactions"),
+    ("with-dspy", "frozen_program"),
+    ("sammo-prompting", "frozen_prompt"),
+]
+
+HEAVY = ["dspy", "sammo", "openai", "pandas", "numpy"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+
+def time_import(directory, module, repeat):
+    timings, loaded = [], set()
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            cwd=ROOT / directory,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        timings.append(float(out[0]) * 1000)
+        if len(out) > 1:
+            loaded.update(out[1].split(","))
+    return statistics.median(timings), sorted(loaded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="max median import time per module")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for directory, module in MODULES:
+        median_ms, loaded = time_import(directory, module, args.repeat)
+        status = "ok"
+        if loaded:
+            status = f"FAIL (imports {', '.join(loaded)})"
+        elif median_ms > args.budget_ms:
+            status = f"FAIL (over {args.budget_ms:.0f} ms budget)"
+        failed = failed or status != "ok"
+        print(f"{directory}/{module}: {median_ms:.1f} ms  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
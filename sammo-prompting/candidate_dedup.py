@@ -0,0 +1,178 @@
+"""Skip duplicate and near-duplicate prompt candidates before they are evaluated.
+
+``InduceInstructions`` and ``Paraphrase`` (and COPRO's instruction proposals)
+often produce candidates that are identical, or nearly so, once rendered.
+Each one is still run over the whole training set at every beam level. A
+``CandidateDeduper`` keys candidates by a hash of their normalised rendering
+and compares MinHash signatures of their word shingles:
+
+- exact matches reuse the score of the earlier evaluation on the same dataset,
+- candidates at least ``threshold`` similar to an evaluated one are skipped:
+  they are not evaluated and get an objective below every evaluated
+  candidate, so they never take a beam slot or become ``best_prompt``,
+- everything else is evaluated as usual.
+
+For SAMMO, wrap the search class:
+
+    DedupBeamSearch = with_dedup(BeamSearch)
+    prompt_optimizer = DedupBeamSearch(runner, mutation_operators, accuracy, depth=3, ..., dedup_threshold=0.9)
+    prompt_optimizer.fit(d_train)
+    print(prompt_optimizer.deduper.stats)
+"""
+import hashlib
+import inspect
+import random
+import re
+from dataclasses import dataclass
+
+_MERSENNE = (1 << 61) - 1
+
+
+def normalize(text):
+    text = re.sub(r"0x[0-9a-f]+", "", text.lower())  # object addresses in reprs
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def canonical_hash(text):
+    return hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()
+
+
+def _shingles(text, k):
+    words = normalize(text).split()
+    return {" ".join(words[i:i + k]) for i in range(max(len(words) - k + 1, 1))}
+
+
+class MinHash:
+    def __init__(self, num_perm=64, shingle_size=3, seed=1):
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE), rng.randrange(_MERSENNE)) for _ in range(num_perm)]
+
+    def signature(self, text):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in _shingles(text, self.shingle_size)
+        ]
+        return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._perms)
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+@dataclass
+class DedupStats:
+    evaluated: int = 0
+    exact: int = 0
+    near: int = 0
+
+    @property
+    def skipped(self):
+        return self.exact + self.near
+
+
+class CandidateDeduper:
+    def __init__(self, threshold=0.9, render=str, num_perm=64, shingle_size=3):
+        self.threshold = threshold
+        self.render = render
+        self.minhash = MinHash(num_perm, shingle_size)
+        self.scores = {}  # dataset key -> {canonical hash -> stored evaluation}
+        self._signatures = {}  # canonical hash -> MinHash signature
+        self.stats = DedupStats()
+
+    def _most_similar(self, signature, keys):
+        best, best_similarity = None, self.threshold
+        for key in keys:
+            similarity = MinHash.similarity(signature, self._signatures[key])
+            if similarity >= best_similarity:
+                best, best_similarity = key, similarity
+        return best
+
+    def plan(self, candidates, dataset=None):
+        """Decide which candidates need evaluating on ``dataset``.
+
+        Returns ``(keys, to_evaluate, near)``: ``keys[i]`` is the canonical
+        hash of the evaluation candidate ``i`` maps to, ``to_evaluate`` holds
+        the ``(candidate, key)`` pairs to score and ``store``, and ``near`` is
+        the set of indices that are only near-duplicates of their key.
+        Duplicates within the batch point at the candidate they duplicate.
+        """
+        stored = self.scores.get(dataset, {})
+        keys, to_evaluate, batch, near = [], [], [], set()
+        for i, candidate in enumerate(candidates):
+            text = self.render(candidate)
+            key = canonical_hash(text)
+            if key in stored or key in batch:
+                self.stats.exact += 1
+                keys.append(key)
+                continue
+            signature = self._signatures.get(key) or self.minhash.signature(text)
+            match = self._most_similar(signature, list(stored) + batch)
+            if match is not None:
+                self.stats.near += 1
+                near.add(i)
+                keys.append(match)
+                continue
+            self.stats.evaluated += 1
+            self._signatures[key] = signature
+            batch.append(key)
+            to_evaluate.append((candidate, key))
+            keys.append(key)
+        return keys, to_evaluate, near
+
+    def store(self, dataset, key, score):
+        self.scores.setdefault(dataset, {})[key] = score
+
+
+def dedupe_texts(texts, threshold=0.9):
+    """Drop exact and near-duplicate strings (e.g. COPRO instruction proposals), keeping the first."""
+    deduper = CandidateDeduper(threshold)
+    return [text for text, _ in deduper.plan(texts)[1]]
+
+
+def _dataset_key(dataset):
+    return getattr(dataset, "fingerprint", None) or id(dataset)
+
+
+def with_dedup(search_cls):
+    """Subclass a SAMMO search that scores candidates through ``evaluate`` (``BeamSearch``, ...).
+
+    ``evaluate`` still returns one row per candidate, in order. Exact
+    duplicates get a copy of the row of the candidate they match, with their
+    own candidate in it. Near-duplicates get the same copy, but with
+    ``objective`` set to the worst possible value and ``skipped_as_near_duplicate_of``
+    naming the evaluated candidate. Scores are kept per dataset, so
+    ``validate()`` evaluates afresh.
+    """
+    parameters = inspect.signature(search_cls.evaluate).parameters
+
+    class DedupSearch(search_cls):
+        def __init__(self, *args, dedup_threshold=0.9, dedup_render=str, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.deduper = CandidateDeduper(dedup_threshold, dedup_render)
+
+        async def evaluate(self, candidates, *args, **kwargs):
+            bound = inspect.signature(super().evaluate).bind_partial(candidates, *args, **kwargs)
+            dataset = _dataset_key(bound.arguments["dataset"]) if "dataset" in parameters else None
+            keys, to_evaluate, near = self.deduper.plan(candidates, dataset)
+            worst = float("-inf") if getattr(self, "_maximize", True) else float("inf")
+            scored = await super().evaluate([c for c, _ in to_evaluate], *args, **kwargs) if to_evaluate else []
+            evaluated = {}
+            for (_, key), row in zip(to_evaluate, scored):
+                self.deduper.store(dataset, key, row)
+                evaluated[key] = row
+            rows = []
+            for i, (candidate, key) in enumerate(zip(candidates, keys)):
+                row = evaluated.pop(key, None)  # the evaluated candidate gets its own row back
+                if row is None:
+                    stored = self.deduper.scores[dataset][key]
+                    row = dict(stored, candidate=candidate)
+                    if i in near:
+                        # never scored itself: keep it out of the beam rather than lend it a score
+                        row.update(objective=worst, skipped_as_near_duplicate_of=stored["candidate"])
+                rows.append(row)
+            return rows
+
+    DedupSearch.__name__ = DedupSearch.__qualname__ = f"Dedup{search_cls.__name__}"
+    return DedupSearch
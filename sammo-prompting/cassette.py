@@ -0,0 +1,187 @@
+"""Record and replay LLM traffic, for offline and deterministic regression runs.
+
+A ``Cassette`` in ``"record"`` mode stores every request a run makes, together
+with the response and the backend latency, in a compact file
+(zlib-compressed JSON records). In ``"replay"`` mode the whole file is
+indexed in memory and requests are answered from it, either straight away or
+after the recorded latency (scaled by ``latency_scale``). This makes it
+possible to time the framework's own overhead, or to reproduce a slow run,
+without a live backend:
+
+    with Cassette("fit.cassette", "record") as cassette:
+        runner = sammo_runner(cassette, api_config={"api_key": os.environ["OPENAI_API_KEY"]})
+        prompt_optimizer = BeamSearch(runner, mutation_operators, accuracy, depth=3)
+        prompt_optimizer.fit(d_train)
+
+    with Cassette("fit.cassette", "replay", latency_scale=0.0) as cassette:
+        runner = sammo_runner(cassette)
+        ...  # same fit, served from memory; cassette.recorded_ms is the time the backend took
+
+For DSPy (``MIPRO.compile``, ``Evaluate``) use ``dspy_lm(cassette, "gpt-3.5-turbo")``
+for each LM. For plain ``openai`` code such as ``ab_test_prompts``, use
+``openai_client(cassette)`` in place of ``openai.OpenAI()``.
+
+Identical requests are matched by occurrence: the n-th time a request is
+made it gets the n-th response recorded for it. Responses therefore don't
+depend on the order in which threads or tasks happen to reach the backend.
+Once a request's responses run out, the last one is repeated.
+"""
+import asyncio
+import hashlib
+import json
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+_HEADER = struct.Struct(">I")
+
+
+class CassetteMiss(KeyError):
+    pass
+
+
+def request_key(request, ignore=()):
+    body = {k: v for k, v in request.items() if k not in ignore}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path, mode="replay", latency_scale=0.0, ignore=("timeout",)):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"mode must be 'record' or 'replay', got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.ignore = tuple(ignore)
+        self.requests = 0
+        self.recorded_ms = 0.0
+        self._entries = defaultdict(list)  # key -> [(latency ms, response json)]
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+        self._file = open(path, "wb") if mode == "record" else None
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            while header := f.read(_HEADER.size):
+                (length,) = _HEADER.unpack(header)
+                entry = json.loads(zlib.decompress(f.read(length)))
+                self._entries[entry["key"]].append((entry["ms"], json.dumps(entry["response"])))
+
+    def record(self, request, response, elapsed_ms):
+        key = request_key(request, self.ignore)
+        entry = {"key": key, "ms": round(elapsed_ms, 3), "request": request, "response": response}
+        payload = zlib.compress(json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8"))
+        with self._lock:
+            self._file.write(_HEADER.pack(len(payload)) + payload)
+            self.requests += 1
+            self.recorded_ms += elapsed_ms
+
+    def _next(self, request):
+        key = request_key(request, self.ignore)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"no recorded response for {request.get('model', 'request')} {key[:12]}")
+            n = self._served[key]
+            self._served[key] += 1
+            ms, response = entries[min(n, len(entries) - 1)]
+            self.requests += 1
+            self.recorded_ms += ms
+        return json.loads(response), ms
+
+    def play(self, request):
+        response, ms = self._next(request)
+        if self.latency_scale:
+            time.sleep(ms * self.latency_scale / 1000)
+        return response
+
+    async def aplay(self, request):
+        response, ms = self._next(request)
+        if self.latency_scale:
+            await asyncio.sleep(ms * self.latency_scale / 1000)
+        return response
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def sammo_runner(cassette, model_id="gpt-4o-mini", **kwargs):
+    """SAMMO ``OpenAIChat`` runner that records to or replays from ``cassette``.
+
+    SAMMO's cache is off by default so that every request reaches the
+    cassette; in replay mode no API key is needed. Raise ``rate_limit`` for
+    replays, otherwise SAMMO's throttle rather than the cassette sets the pace.
+    """
+    from sammo.runners import OpenAIChat
+
+    class _CassetteOpenAIChat(OpenAIChat):
+        async def _call_backend(self, request):
+            if cassette.mode == "replay":
+                return await cassette.aplay(request)
+            start = time.perf_counter()
+            response = await super()._call_backend(request)
+            cassette.record(request, response, (time.perf_counter() - start) * 1000)
+            return response
+
+    kwargs.setdefault("cache", None)
+    if cassette.mode == "replay":
+        kwargs.setdefault("api_config", {"api_key": "replay"})
+    return _CassetteOpenAIChat(model_id=model_id, **kwargs)
+
+
+def dspy_lm(cassette, model="gpt-3.5-turbo", **kwargs):
+    """``dspy.OpenAI`` chat LM that records to or replays from ``cassette``.
+
+    DSPy's request cache still applies while recording, so point it at an
+    empty cache directory to capture real latencies. Replays need no API key;
+    don't pass one, as ``dspy.OpenAI`` would set it globally for ``openai``.
+    """
+    import dspy
+
+    class _CassetteDSPyLM(dspy.OpenAI):
+        def basic_request(self, prompt, **kwargs):
+            request = {**self.kwargs, **kwargs, "messages": [{"role": "user", "content": prompt}]}
+            request.pop("prompt", None)
+            if cassette.mode == "record":
+                start = time.perf_counter()
+                response = super().basic_request(prompt, **kwargs)
+                cassette.record(request, response, (time.perf_counter() - start) * 1000)
+                return response
+            response = cassette.play(request)
+            self.history.append({"prompt": prompt, "response": response, "kwargs": request, "raw_kwargs": kwargs})
+            return response
+
+    return _CassetteDSPyLM(model=model, model_type="chat", **kwargs)
+
+
+def openai_client(cassette, client=None):
+    """Stand-in for ``openai.OpenAI()`` whose ``chat.completions.create`` goes through ``cassette``."""
+    from types import SimpleNamespace
+
+    import openai
+    from openai.types.chat import ChatCompletion
+
+    if client is None and cassette.mode == "record":
+        client = openai.OpenAI()
+
+    def create(**request):
+        if cassette.mode == "replay":
+            return ChatCompletion.model_validate(cassette.play(request))
+        start = time.perf_counter()
+        response = client.chat.completions.create(**request)
+        cassette.record(request, response.model_dump(), (time.perf_counter() - start) * 1000)
+        return response
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
@@ -0,0 +1,224 @@
+"""Sharded, resumable bulk classification with a SAMMO prompt program.
+
+Streams an input CSV in shards of ``--shard-size`` rows to worker processes,
+each of which builds the runner and prompt program once and labels its shards
+with ``Output.run``. Every finished shard is written atomically to
+``<output>/rows-<start>-<end>.jsonl`` (or ``.parquet``), so the file names are
+the record of completed row offsets: a killed job rerun with the same
+arguments skips them and only labels what is missing.
+
+    python classify_job.py transactions.csv labelled/ --workers 8
+    python classify_job.py transactions.csv labelled/ --program best_prompt.pkl --format parquet
+
+``--program`` is either ``module:function`` returning an ``Output`` (default:
+the notebook labeler in transactions.py) or a pickle of one, e.g. a
+``prompt_optimizer.best_prompt`` saved with ``save_program``. ``--runner`` is a
+``module:function`` returning a runner; it is called with ``cache`` and
+``rate_limit`` keyword arguments. Each worker gets its own cache file in
+``--cache-dir`` (SAMMO's TSV cache can't be shared between processes) and
+an equal share of ``--rate-limit``, the total requests per second.
+"""
+import argparse
+import csv
+import importlib
+import json
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+
+MANIFEST = "_manifest.json"
+
+_program = None
+_runner = None
+
+
+def save_program(program, path):
+    """Pickle an optimized prompt program (e.g. ``best_prompt``) for ``--program``."""
+    with open(path, "wb") as f:
+        pickle.dump(program, f)
+
+
+def _load(spec, **kwargs):
+    if spec.endswith(".pkl"):
+        with open(spec, "rb") as f:
+            return pickle.load(f)
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)(**kwargs)
+
+
+def worker_rate_limits(rate_limit, workers):
+    """Split a total requests-per-second limit into whole per-worker limits."""
+    return [rate_limit // workers + (i < rate_limit % workers) for i in range(workers)]
+
+
+def _init_worker(program_spec, runner_spec, slots, cache_dir, rate_limits):
+    global _program, _runner
+    # slots are handed out once per worker process, so cache file names stay the same across resumes
+    slot = slots.get()
+    runner_kwargs = {"cache": str(Path(cache_dir) / f"worker-{slot:03d}.tsv") if cache_dir else None}
+    if rate_limits is not None:
+        runner_kwargs["rate_limit"] = rate_limits[slot]
+    _program = _load(program_spec)
+    _runner = _load(runner_spec, **runner_kwargs)
+
+
+def _label_shard(start, rows, input_field):
+    from sammo.data import DataTable
+
+    table = DataTable([row[input_field] for row in rows])
+    result = _program.run(_runner, table, progress_callback=False)
+    return start, [
+        {"row": start + i, **row, "label": label}
+        for i, (row, label) in enumerate(zip(rows, result.outputs.normalized_values(on_empty="")))
+    ]
+
+
+def shard_path(output_dir, start, end, fmt):
+    return Path(output_dir) / f"rows-{start:012d}-{end:012d}.{fmt}"
+
+
+def completed_shards(output_dir, fmt):
+    """``{start: end}`` row offsets of the shards already written to ``output_dir``."""
+    done = {}
+    for path in Path(output_dir).glob(f"rows-*.{fmt}"):
+        start, end = path.stem.split("-")[1:]
+        done[int(start)] = int(end)
+    return done
+
+
+def _write_shard(records, path, fmt):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    if fmt == "jsonl":
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.Table.from_pylist(records), tmp)
+    os.replace(tmp, path)
+
+
+def iter_shards(input_path, shard_size, skip):
+    """Yield ``(start, rows)`` shards of the CSV, without materialising skipped ones."""
+    with open(input_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        start = 0
+        while True:
+            if start in skip:
+                # still has to be read past, but is never kept in memory
+                n = sum(1 for _ in islice(reader, shard_size))
+                if n == 0:
+                    return
+                start += n
+                continue
+            rows = list(islice(reader, shard_size))
+            if not rows:
+                return
+            yield start, rows
+            start += len(rows)
+
+
+def count_rows(input_path):
+    with open(input_path, newline="", encoding="utf-8") as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+def _check_manifest(output_dir, settings):
+    path = Path(output_dir) / MANIFEST
+    if path.exists():
+        previous = json.loads(path.read_text())
+        for key in ("input", "shard_size", "input_field", "format"):
+            if previous.get(key) != settings[key]:
+                raise SystemExit(f"{output_dir} was written with {key}={previous.get(key)!r}; "
+                                 f"rerun with the same value or use a new output directory")
+        settings["total_rows"] = previous["total_rows"]
+    else:
+        settings["total_rows"] = count_rows(settings["input"])
+        path.write_text(json.dumps(settings, indent=2))
+    return settings
+
+
+def run_job(input_path, output_dir, program="transactions:labeling_program", runner="transactions:make_runner",
+            input_field="description", shard_size=1000, workers=4, fmt="jsonl", cache_dir=None,
+            rate_limit=None, log=print):
+    """Label ``input_path`` into ``output_dir``; ``cache_dir`` defaults to ``<output_dir>/_cache``."""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    settings = _check_manifest(output_dir, {
+        "input": str(Path(input_path).resolve()),
+        "shard_size": shard_size,
+        "input_field": input_field,
+        "format": fmt,
+        "program": program,
+    })
+    total = settings["total_rows"]
+    done = completed_shards(output_dir, fmt)
+    rows_done = sum(end - start for start, end in done.items())
+    if rows_done:
+        log(f"resuming: {rows_done}/{total} rows already labelled in {len(done)} shards")
+
+    if cache_dir is None:
+        cache_dir = Path(output_dir) / "_cache"
+    if cache_dir:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    rate_limits = None
+    if rate_limit is not None:
+        if rate_limit < 1:
+            raise ValueError(f"rate_limit must be at least 1 request per second, got {rate_limit}")
+        workers = min(workers, rate_limit)  # a worker below 1 request/s would only sit idle
+        rate_limits = worker_rate_limits(rate_limit, workers)
+    slots = multiprocessing.Queue()
+    for slot in range(workers):
+        slots.put(slot)
+
+    started, rows_this_run = time.monotonic(), 0
+    shards = iter_shards(input_path, shard_size, done)
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(program, runner, slots, cache_dir and str(cache_dir), rate_limits)) as pool:
+        pending = set()
+        while True:
+            # keep at most two shards per worker in flight so memory stays flat
+            for start, rows in islice(shards, max(2 * workers - len(pending), 0)):
+                pending.add(pool.submit(_label_shard, start, rows, input_field))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                start, records = future.result()
+                _write_shard(records, shard_path(output_dir, start, start + len(records), fmt), fmt)
+                rows_done += len(records)
+                rows_this_run += len(records)
+                rate = rows_this_run / (time.monotonic() - started)
+                eta = (total - rows_done) / rate if rate else float("inf")
+                log(f"{rows_done}/{total} rows  {rate:.1f} rows/s  ETA {eta / 60:.1f} min")
+    return rows_done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV file to label")
+    parser.add_argument("output", help="directory for shard files (reuse it to resume)")
+    parser.add_argument("--program", default="transactions:labeling_program")
+    parser.add_argument("--runner", default="transactions:make_runner")
+    parser.add_argument("--input-field", default="description")
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--cache-dir", default=None,
+                        help="per-worker cache files (default: <output>/_cache; '' to disable)")
+    parser.add_argument("--rate-limit", type=int, default=None,
+                        help="total requests per second, split across workers")
+    args = parser.parse_args(argv)
+    run_job(args.input, args.output, args.program, args.runner, args.input_field, args.shard_size,
+            args.workers, args.format, args.cache_dir, args.rate_limit)
+
+
+if __name__ == "__main__":
+    main()
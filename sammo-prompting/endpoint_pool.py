@@ -0,0 +1,303 @@
+"""Load-balanced pool of OpenAI-compatible endpoints (LM Studio, llama.cpp, vLLM, ...).
+
+``OpenAIChat(base_url=...)`` and ``dspy.OpenAI(...)`` talk to one backend. An
+``EndpointPool`` spreads requests over several: each request goes to the
+healthy endpoint with the fewest requests in flight ("least_outstanding") or
+the lowest expected latency ("latency"). An endpoint that fails
+``max_failures`` times in a row is ejected for ``eject_seconds`` (doubling on
+every repeat ejection), and a failed request is retried on a different node.
+Only connection errors, timeouts, 5xx and 429 count as failures; client errors
+such as an over-long prompt are raised straight away.
+
+    pool = EndpointPool(["http://box1:1234/v1", "http://box2:1234/v1"], model="llama-3.2-3b-instruct")
+
+    # SAMMO
+    runner = sammo_runner(pool, cache="cache.tsv", rate_limit=8)
+    Output(GenerateText("Hello World!")).run(runner)
+
+    # DSPy (from with-dspy/, add ``sys.path.append("../sammo-prompting")`` first)
+    dspy.configure(lm=dspy_lm(pool))
+
+openai, sammo and dspy are only imported when a client, runner or LM is built.
+"""
+import asyncio
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+
+
+def is_node_failure(error):
+    """Whether ``error`` says something about the node rather than the request.
+
+    Connection errors, timeouts, 5xx and 429 count towards ejection and are
+    retried on another node; client errors (400, 401, 404, ...) are not.
+    """
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    return False
+
+
+@dataclass
+class Endpoint:
+    base_url: str
+    api_key: str = "lm-studio"
+    model: str = None
+    outstanding: int = 0
+    latency: float = None  # EWMA of successful request latency, seconds
+    failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    _client: object = field(default=None, repr=False)
+    _async_clients: weakref.WeakKeyDictionary = field(default_factory=weakref.WeakKeyDictionary, repr=False)
+
+    def client(self, timeout):
+        if self._client is None:
+            import openai
+
+            self._client = openai.OpenAI(base_url=self.base_url, api_key=self.api_key, timeout=timeout, max_retries=0)
+        return self._client
+
+    def async_client(self, timeout):
+        # one client per event loop: SAMMO's Output.run starts a fresh loop with asyncio.run on
+        # every call, and a client's connections can't be reused once their loop is closed
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            import openai
+
+            for closed in [other for other in self._async_clients if other.is_closed()]:
+                del self._async_clients[closed]  # the client may keep its loop alive
+
+            self._async_clients[loop] = openai.AsyncOpenAI(
+                base_url=self.base_url, api_key=self.api_key, timeout=timeout, max_retries=0
+            )
+        return self._async_clients[loop]
+
+
+class NoHealthyEndpoint(RuntimeError):
+    pass
+
+
+class EndpointPool:
+    POLICIES = ("least_outstanding", "latency")
+
+    def __init__(
+        self,
+        endpoints,
+        model=None,
+        api_key="lm-studio",
+        policy="least_outstanding",
+        max_attempts=3,
+        max_failures=3,
+        eject_seconds=30.0,
+        timeout=60.0,
+        latency_decay=0.3,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy must be one of {self.POLICIES}, got {policy!r}")
+        self.endpoints = []
+        for spec in endpoints:
+            spec = {"base_url": spec} if isinstance(spec, str) else dict(spec)
+            spec.setdefault("api_key", api_key)
+            spec.setdefault("model", model)
+            self.endpoints.append(Endpoint(**spec))
+        if not self.endpoints:
+            raise ValueError("need at least one endpoint")
+        self.model = model
+        self.policy = policy
+        self.max_attempts = max_attempts
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.timeout = timeout
+        self.latency_decay = latency_decay
+        self._lock = threading.Lock()
+        self._health_thread = None
+        self._stop = threading.Event()
+
+    # --- scheduling -------------------------------------------------------
+
+    def _score(self, ep):
+        if self.policy == "latency" and ep.latency is not None:
+            # expected time to finish everything queued on the node plus this request
+            return (ep.outstanding + 1) * ep.latency
+        return ep.outstanding
+
+    def acquire(self, exclude=()):
+        """Pick an endpoint and count the request as in flight on it."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [ep for ep in self.endpoints if ep.ejected_until <= now]
+            candidates = [ep for ep in healthy if ep not in exclude] or healthy
+            if not candidates:
+                raise NoHealthyEndpoint(f"all {len(self.endpoints)} endpoints are ejected")
+            # untried (no latency yet) nodes win ties so new nodes get warmed up
+            ep = min(candidates, key=lambda e: (self._score(e), e.latency is not None, e.requests))
+            ep.outstanding += 1
+            ep.requests += 1
+            return ep
+
+    def release(self, ep, elapsed=None, error=None):
+        with self._lock:
+            ep.outstanding -= 1
+            if error is None:
+                ep.failures = 0
+                ep.ejections = 0
+                if elapsed is not None:
+                    if ep.latency is None:
+                        ep.latency = elapsed
+                    else:
+                        ep.latency += self.latency_decay * (elapsed - ep.latency)
+                return
+            ep.errors += 1
+            ep.failures += 1
+            if ep.failures >= self.max_failures:
+                self._eject(ep)
+
+    def _eject(self, ep):
+        ep.ejected_until = time.monotonic() + self.eject_seconds * 2 ** ep.ejections
+        ep.ejections += 1
+        ep.failures = 0
+
+    # --- requests ---------------------------------------------------------
+
+    def _request_for(self, ep, request):
+        request = dict(request)
+        if ep.model is not None:
+            request["model"] = ep.model
+        return request
+
+    def chat(self, request):
+        """Send a chat-completions request (as a dict) and return the response dict."""
+        tried, last_error = [], None
+        for _ in range(self.max_attempts):
+            ep = self.acquire(exclude=tried)
+            tried.append(ep)
+            start = time.monotonic()
+            try:
+                response = ep.client(self.timeout).chat.completions.create(**self._request_for(ep, request))
+            except Exception as e:
+                if not is_node_failure(e):
+                    self.release(ep)
+                    raise
+                self.release(ep, error=e)
+                last_error = e
+                continue
+            self.release(ep, time.monotonic() - start)
+            return response.model_dump(exclude_none=True)  # SAMMO calls .get on nested usage fields
+        raise last_error
+
+    async def achat(self, request):
+        """Async version of ``chat``."""
+        tried, last_error = [], None
+        for _ in range(self.max_attempts):
+            ep = self.acquire(exclude=tried)
+            tried.append(ep)
+            start = time.monotonic()
+            try:
+                response = await ep.async_client(self.timeout).chat.completions.create(
+                    **self._request_for(ep, request)
+                )
+            except asyncio.CancelledError:
+                self.release(ep)
+                raise
+            except Exception as e:
+                if not is_node_failure(e):
+                    self.release(ep)
+                    raise
+                self.release(ep, error=e)
+                last_error = e
+                continue
+            self.release(ep, time.monotonic() - start)
+            return response.model_dump(exclude_none=True)
+        raise last_error
+
+    # --- health checks ----------------------------------------------------
+
+    def check_health(self):
+        """Probe every endpoint's ``/models``; eject the failing ones and readmit the rest."""
+        for ep in self.endpoints:
+            try:
+                ep.client(self.timeout).models.list()
+            except Exception:
+                with self._lock:
+                    if ep.ejected_until <= time.monotonic():
+                        self._eject(ep)
+            else:
+                with self._lock:
+                    ep.ejected_until = 0.0
+                    ep.failures = 0
+
+    def start_health_checks(self, interval=10.0):
+        """Run ``check_health`` every ``interval`` seconds on a daemon thread."""
+        if self._health_thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.check_health()
+
+        self._stop.clear()
+        self._health_thread = threading.Thread(target=loop, name="endpoint-pool-health", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join()
+            self._health_thread = None
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "base_url": ep.base_url,
+                    "healthy": ep.ejected_until <= now,
+                    "outstanding": ep.outstanding,
+                    "requests": ep.requests,
+                    "errors": ep.errors,
+                    "latency_s": ep.latency,
+                }
+                for ep in self.endpoints
+            ]
+
+
+def sammo_runner(pool, model_id=None, **kwargs):
+    """SAMMO ``OpenAIChat`` runner whose backend calls are spread over ``pool``.
+
+    Caching, rate limiting and retries stay with SAMMO; only the HTTP request
+    is routed. ``rate_limit`` should be raised in line with the number of
+    endpoints, otherwise SAMMO's own throttle caps throughput.
+    """
+    from sammo.runners import OpenAIChat
+
+    class _PooledOpenAIChat(OpenAIChat):
+        async def _call_backend(self, request):
+            return await pool.achat(request)
+
+    kwargs.setdefault("api_config", {"api_key": pool.endpoints[0].api_key})
+    return _PooledOpenAIChat(model_id=model_id or pool.model, **kwargs)
+
+
+def dspy_lm(pool, model=None, **kwargs):
+    """``dspy.OpenAI`` chat LM whose requests are spread over ``pool``, for ``dspy.configure(lm=...)``."""
+    import dspy
+
+    class _PooledDSPyLM(dspy.OpenAI):
+        def basic_request(self, prompt, **kwargs):
+            raw_kwargs = kwargs
+            kwargs = {**self.kwargs, **kwargs, "messages": [{"role": "user", "content": prompt}]}
+            kwargs.pop("prompt", None)
+            response = pool.chat(kwargs)
+            self.history.append({"prompt": prompt, "response": response, "kwargs": kwargs, "raw_kwargs": raw_kwargs})
+            return response
+
+    # no api_key / api_base: dspy.OpenAI would write them to the global openai module,
+    # redirecting every other dspy.OpenAI LM in the process; requests here go through the pool
+    return _PooledDSPyLM(model=model or pool.model, model_type="chat", **kwargs)
@@ -0,0 +1,343 @@
+"""Freeze an optimized SAMMO program into a flat template for serving.
+
+``best_prompt`` from ``BeamSearch`` / ``EnumerativeSearch`` is a full component
+tree (``Output`` -> extractor -> ``MetaPrompt`` -> ``Section`` /
+``FewshotExamples`` / ``InputData`` with a ``data_formatter``) that is
+re-rendered for every minibatch. ``freeze`` renders it once per batch size,
+with placeholder inputs, and keeps only the literal text between the input
+slots. It pairs this with a precompiled parser for the formatter's output
+format:
+
+    frozen = freeze(prompt_optimizer.best_prompt, runner)
+    frozen.save("labeler.frozen.json")
+
+    # on the serving worker: stdlib only, no sammo import
+    frozen = FrozenPrompt.load("labeler.frozen.json")
+    prompt, system_prompt = frozen.render(["withdrew cash for the weekend"])
+    labels = frozen.parse(completion_text, 1)
+    labels = frozen(complete, descriptions)  # complete(prompt, system_prompt=..., **frozen.request) -> text
+
+    print(benchmark(frozen, descriptions[:5], original=prompt_optimizer.best_prompt, runner=runner))
+
+How the formatter escapes inputs (JSON, XML or verbatim) is detected from a
+probe rendering, so the frozen output matches the tree's rendering exactly.
+``freeze`` checks this on a few sample inputs and rejects trees whose prompt
+depends on the input (``EmbeddingFewshotExamples``); ``verify`` re-checks it
+on real inputs. Inputs must be plain strings.
+"""
+import html
+import json
+import re
+import time
+
+_SLOT = re.compile(r"FRZ(\d+)SLOT")
+_PROBE = "x\"<&>' \n\tx  é"
+_PROBE_INPUT = f"FRZPROBEA{_PROBE}FRZPROBEB"
+_CHECK_INPUTS = ["coffee at the airport", 'Rent for March <flat 2> & "fees"', "refund\nstore credit", "x"]
+
+# components that pick prompt text per input, so no single rendering can stand in for them
+DYNAMIC = ("EmbeddingFewshotExamples",)
+
+
+def _xml_escape(s, entities=()):
+    # same as xml.sax.saxutils.escape, which pulls in urllib and http.client on import
+    s = s.replace("&", "&amp;").replace(">", "&gt;").replace("<", "&lt;")
+    for char, entity in entities:
+        s = s.replace(char, entity)
+    return s
+
+
+ESCAPES = {
+    "raw": lambda s: s,
+    "json": lambda s: json.dumps(s, ensure_ascii=False)[1:-1],
+    "json_ascii": lambda s: json.dumps(s)[1:-1],
+    "xml": _xml_escape,
+    "xml_attr": lambda s: _xml_escape(s, [('"', "&quot;")]),
+    "collapse": lambda s: " ".join(s.split()),
+}
+
+# formatter class name -> (parser kind, default output field name)
+FORMATTERS = {
+    "JSONDataFormatter": ("json", "output"),
+    "XMLDataFormatter": ("xml", "output"),
+    "QuestionAnswerFormatter": ("qa", "A"),
+}
+
+
+def _compile_parser(kind, name):
+    name = re.escape(name)
+    if kind == "json":
+        return re.compile(rf'"{name}"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d[\d.eE+-]*|true|false|null)')
+    if kind == "xml":
+        return re.compile(rf"<{name}\b([^>]*)>(.*?)</{name}>", re.S)
+    if kind == "qa":
+        return re.compile(rf"^\s*{name}\[(\d+)\]:[ \t]*(.*?)\s*$", re.M)
+    return None
+
+
+_XML_ID = re.compile(r'\bid\s*=\s*["\']?(\d+)')
+_XML_VALUE = re.compile(r"<value\b[^>]*>(.*?)</value>", re.S)
+_JSON_ARRAY = re.compile(r"\[.*\]", re.S)
+
+
+def _by_id(pairs):
+    """Values ordered by their row id; rows without an id keep their position."""
+    return [value for _, _, value in sorted((i if i is not None else n, n, v) for n, (i, v) in enumerate(pairs))]
+
+
+def _xml_row(attrs, body):
+    row_id = _XML_ID.search(attrs)
+    value = _XML_VALUE.search(body)
+    text = value.group(1) if value else body
+    return int(row_id.group(1)) if row_id else None, html.unescape(text.strip())
+
+
+def sample_completion(parser, output_name, labels):
+    """A completion in the formatter's output format, one row per label."""
+    if parser == "json":
+        return json.dumps([{"id": i, output_name: label} for i, label in enumerate(labels)])
+    if parser == "xml":
+        return "\n".join(f'<{output_name} id="{i}"><value>{_xml_escape(label)}</value></{output_name}>'
+                         for i, label in enumerate(labels))
+    if parser == "qa":
+        return "\n".join(f"{output_name}[{i}]: {label}" for i, label in enumerate(labels))
+    return "\n".join(labels)
+
+
+class FrozenPrompt:
+    """Flat templates (one per batch size) plus a parser; no sammo needed at runtime."""
+
+    def __init__(self, templates, escape="raw", parser="text", output_name="output", system_prompt=None,
+                 request=None):
+        self.templates = {int(k): (parts, slots) for k, (parts, slots) in templates.items()}
+        self.minibatch_size = max(self.templates)
+        self.escape = escape
+        self.parser = parser
+        self.output_name = output_name
+        self.system_prompt = system_prompt
+        self.request = dict(request or {})
+        self._escape = ESCAPES[escape]
+        self._pattern = _compile_parser(parser, output_name)
+
+    def render(self, inputs):
+        """Return ``(prompt, system_prompt)`` for one minibatch of input strings."""
+        parts, slots = self.templates[len(inputs)]
+        values = [self._escape(str(x)) for x in inputs]
+        out = [parts[0]]
+        for slot, part in zip(slots, parts[1:]):
+            out.append(values[slot])
+            out.append(part)
+        return "".join(out), self.system_prompt
+
+    def parse(self, text, n):
+        """Labels for a minibatch of ``n`` rows, ``""`` where the completion has none."""
+        if self.parser == "json":
+            values = self._parse_json(text)
+        elif self.parser == "xml":
+            values = _by_id([_xml_row(attrs, body) for attrs, body in self._pattern.findall(text)])
+        elif self.parser == "qa":
+            values = _by_id([(int(i), v) for i, v in self._pattern.findall(text)])
+        else:
+            values = [text.strip()] if n == 1 else [line.strip() for line in text.splitlines() if line.strip()]
+        values = ["" if v is None else str(v) for v in values[:n]]
+        return values + [""] * (n - len(values))
+
+    def _parse_json(self, text):
+        found = _JSON_ARRAY.search(text)
+        try:
+            rows = json.loads(found.group(0)) if found else None
+        except ValueError:
+            rows = None
+        if isinstance(rows, list) and all(isinstance(row, dict) for row in rows):
+            return _by_id([(row.get("id") if isinstance(row.get("id"), int) else None, row.get(self.output_name))
+                           for row in rows])
+        return [json.loads(m) for m in self._pattern.findall(text)]
+
+    def __call__(self, complete, inputs):
+        """Label ``inputs`` in minibatches with ``complete(prompt, system_prompt=..., **request) -> text``."""
+        labels = []
+        for start in range(0, len(inputs), self.minibatch_size):
+            batch = inputs[start:start + self.minibatch_size]
+            prompt, system_prompt = self.render(batch)
+            labels.extend(self.parse(complete(prompt, system_prompt=system_prompt, **self.request), len(batch)))
+        return labels
+
+    def to_dict(self):
+        return {
+            "templates": {str(k): [parts, slots] for k, (parts, slots) in self.templates.items()},
+            "escape": self.escape,
+            "parser": self.parser,
+            "output_name": self.output_name,
+            "system_prompt": self.system_prompt,
+            "request": self.request,
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def _components(component, seen=None):
+    """Every object in a SAMMO tree, depth first; only sammo objects are looked inside."""
+    seen = set() if seen is None else seen
+    if id(component) in seen:
+        return
+    seen.add(id(component))
+    if isinstance(component, (list, tuple)):
+        children = component
+    elif isinstance(component, dict):
+        children = component.values()
+    else:
+        yield component
+        if not type(component).__module__.startswith("sammo"):
+            return
+        children = getattr(component, "__dict__", {}).values()
+    for child in children:
+        yield from _components(child, seen)
+
+
+def _find_formatter(component):
+    return next((c for c in _components(component) if type(c).__name__.endswith("Formatter")), None)
+
+
+def _capture(output, runner, inputs, constants=None, completion=""):
+    """Run ``output`` on ``inputs`` with ``runner.generate_text`` swapped for a recorder.
+
+    The recorder answers every call with ``completion``. Returns the recorded
+    ``(prompt, kwargs)`` calls and the run's result table.
+    """
+    from sammo.base import LLMResult
+    from sammo.data import DataTable
+
+    calls = []
+
+    async def generate_text(prompt, **kwargs):
+        calls.append((prompt, kwargs))
+        return LLMResult(completion)
+
+    patched = "generate_text" in vars(runner)
+    original = runner.generate_text
+    runner.generate_text = generate_text
+    try:
+        table = DataTable(list(inputs)) if constants is None else DataTable(list(inputs), constants=constants)
+        result = output.run(runner, table, progress_callback=False)
+    finally:
+        if patched:
+            runner.generate_text = original
+        else:
+            del runner.generate_text
+    return calls, result
+
+
+def _render_once(output, runner, inputs, constants, completion=""):
+    calls, result = _capture(output, runner, inputs, constants, completion)
+    if len(calls) != 1:
+        raise ValueError(f"can only freeze programs that make one LLM call per minibatch, got {len(calls)}")
+    prompt, kwargs = calls[0]
+    if not isinstance(prompt, str):
+        raise TypeError(f"can only freeze text prompts, got {type(prompt).__name__}")
+    return prompt, kwargs, result
+
+
+def _output_format(output):
+    formatter = _find_formatter(output)
+    parser, output_name = FORMATTERS.get(type(formatter).__name__, ("text", "output"))
+    names = getattr(formatter, "names", None) or getattr(formatter, "_names", None) or {}
+    # the model answers in the format of the few-shot examples, i.e. with the gold label's name
+    return parser, names.get("gold_label") or output_name
+
+
+def _batch_size(output):
+    return getattr(output, "row_batch_size", None) or getattr(output, "minibatch_size", None) or 1
+
+
+def freeze(output, runner, constants=None):
+    """Freeze a SAMMO ``Output`` program into a ``FrozenPrompt``.
+
+    ``runner`` runs the tree, but its ``generate_text`` is swapped for a
+    recorder, so no requests are sent. The recorder answers in the
+    formatter's output format, and the frozen parser must read that answer
+    exactly as SAMMO's extractor does, or freezing fails. Components that
+    select prompt text per input (``DYNAMIC``) are rejected, and the result
+    is checked with ``verify`` on a few sample inputs before it is returned.
+    """
+    dynamic = sorted({type(c).__name__ for c in _components(output) if type(c).__name__ in DYNAMIC})
+    if dynamic:
+        raise ValueError(f"{', '.join(dynamic)} select prompt text per input, which freeze can't reproduce")
+    parser, output_name = _output_format(output)
+
+    probe_completion = sample_completion(parser, output_name, ["x"])
+    probe, _, _ = _render_once(output, runner, [_PROBE_INPUT], constants, probe_completion)
+    found = re.search("FRZPROBEA(.*?)FRZPROBEB", probe, re.S)
+    escape = next((name for name, fn in ESCAPES.items() if found and fn(_PROBE) == found.group(1)), None)
+    if escape is None:
+        raise ValueError("the data formatter transforms inputs in a way freeze can't reproduce")
+
+    templates, request, system_prompt, checks = {}, {}, None, {}
+    for k in range(1, _batch_size(output) + 1):
+        labels = [f"frozenlabel{i}" for i in range(k)]
+        completion = sample_completion(parser, output_name, labels)
+        prompt, kwargs, result = _render_once(output, runner, [f"FRZ{i}SLOT" for i in range(k)], constants,
+                                              completion)
+        pieces = _SLOT.split(prompt)
+        templates[k] = (pieces[0::2], [int(i) for i in pieces[1::2]])
+        system_prompt = kwargs.pop("system_prompt", None)
+        if system_prompt is not None and _SLOT.search(system_prompt):
+            raise ValueError("inputs are rendered into the system prompt, which freeze doesn't support")
+        kwargs.pop("history", None)
+        request = {key: value for key, value in kwargs.items() if isinstance(value, (str, int, float, bool))}
+        checks[k] = (completion, [str(v) for v in result.outputs.normalized_values(on_empty="")])
+
+    frozen = FrozenPrompt(templates, escape, parser, output_name, system_prompt, request)
+    for k, (completion, extracted) in checks.items():
+        if frozen.parse(completion, k) != extracted:
+            raise ValueError(f"the {parser!r} parser reads {completion!r} as {frozen.parse(completion, k)}, "
+                             f"but SAMMO's extractor gives {extracted}")
+    if not verify(frozen, output, runner, _CHECK_INPUTS, constants):
+        raise ValueError("the frozen prompt renders sample inputs differently from the tree; "
+                         "part of the prompt depends on the input")
+    return frozen
+
+
+def verify(frozen, output, runner, inputs, constants=None):
+    """Check that ``frozen`` renders ``inputs`` exactly as the original tree does, at every batch size."""
+    inputs = list(inputs)
+    for k in frozen.templates:
+        batch = [inputs[i % len(inputs)] for i in range(k)]
+        completion = sample_completion(frozen.parser, frozen.output_name, ["x"] * k)
+        prompt, kwargs, _ = _render_once(output, runner, batch, constants, completion)
+        if frozen.render(batch) != (prompt, kwargs.get("system_prompt")):
+            return False
+    return True
+
+
+def _per_call_us(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def benchmark(frozen, inputs, completion=None, number=10000, original=None, runner=None, original_number=50):
+    """Microseconds per render and per parse for one minibatch of ``inputs``.
+
+    With ``original`` (and its ``runner``) the tree's own rendering is timed too,
+    on the same minibatch, so the saving per request is visible.
+    """
+    inputs = list(inputs)[:frozen.minibatch_size]
+    if completion is None:
+        completion = sample_completion(frozen.parser, frozen.output_name, ["label"] * len(inputs))
+    result = {
+        "render_us": _per_call_us(lambda: frozen.render(inputs), number),
+        "parse_us": _per_call_us(lambda: frozen.parse(completion, len(inputs)), number),
+    }
+    if original is not None:
+        result["original_render_us"] = _per_call_us(
+            lambda: _capture(original, runner, inputs, completion=completion), original_number)
+        result["speedup"] = result["original_render_us"] / result["render_us"]
+    return result
@@ -0,0 +1,320 @@
+"""Run-level profiling across SAMMO call traces.
+
+``result.outputs[0].plot_call_trace()`` shows a single output. ``RunProfiler``
+instead aggregates every trace produced while it is active, covering all rows
+and minibatches of ``Output.run`` as well as every candidate evaluated by
+``BeamSearch.fit``. Each component node gets the wall time, queue wait,
+tokens and retries of the LLM calls beneath it:
+
+    with RunProfiler(runner) as profile:
+        prompt_optimizer.fit(d_train)
+
+    print(profile.report())
+    profile.save_speedscope("fit.speedscope.json")  # open at https://www.speedscope.app
+    profile.save_folded("fit.folded")               # for flamegraph.pl / inferno
+
+Prompt sections (``Section``, ``FewshotExamples``, ``InputData``, ...) don't call
+the LLM, so they are charged their share of the input tokens of the call they
+were rendered into. The share is proportional to the rendered text length.
+"""
+import contextvars
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, fields
+
+_current_call = contextvars.ContextVar("_current_call", default=None)
+
+
+@dataclass
+class NodeStats:
+    calls: int = 0
+    wall_ms: float = 0.0
+    queue_ms: float = 0.0
+    input_tokens: float = 0.0
+    output_tokens: float = 0.0
+    retries: int = 0
+
+    def add(self, other):
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+@dataclass
+class _CallRecord:
+    wall_ms: float = 0.0
+    backend_ms: float = 0.0
+    backend_calls: int = 0
+
+
+def frame_name(op):
+    """Label for a component node, e.g. ``GenerateText`` or ``Section#instructions``."""
+    if op is None:
+        return "<input>"
+    name = type(op).__name__
+    ref = getattr(op, "_id", None) or getattr(op, "reference_id", None) or getattr(op, "name", None)
+    if isinstance(ref, str) and ref:
+        name = f"{name}#{ref.lstrip('#')}"
+    return name
+
+
+def _parents(result):
+    parent = getattr(result, "parent", None)
+    if parent is None:
+        return []
+    if isinstance(parent, (list, tuple)):
+        return [p for p in parent if p is not None]
+    return [parent]
+
+
+def _text_length(result):
+    return len(str(getattr(result, "value", "") or ""))
+
+
+def _is_llm_call(result):
+    return hasattr(result, "costs")
+
+
+def _tokens(costs):
+    if costs is None:
+        return 0, 0
+    return getattr(costs, "input", 0) or 0, getattr(costs, "output", 0) or 0
+
+
+class RunProfile:
+    """Metrics aggregated by component stack (root component first)."""
+
+    def __init__(self):
+        self.stacks = defaultdict(NodeStats)
+        self.runs = 0
+
+    def add_trace(self, result, timings=None, _seen=None):
+        """Fold one output's call trace into the profile.
+
+        ``timings`` maps ``id(llm_result)`` to a ``_CallRecord``; ``_seen`` dedupes
+        LLM calls shared by the rows of a minibatch.
+        """
+        timings = timings or {}
+        _seen = set() if _seen is None else _seen
+        self._walk(result, (), timings, _seen)
+
+    def add_table(self, table, timings=None):
+        """Fold every row of a DataTable returned by ``Output.run``."""
+        seen = set()
+        for result in table.outputs.raw_values:
+            if result is not None:
+                self.add_trace(result, timings, seen)
+        self.runs += 1
+
+    def _walk(self, result, stack, timings, seen):
+        stack = stack + (frame_name(getattr(result, "op", None)),)
+        if _is_llm_call(result):
+            if id(result) in seen:
+                return
+            seen.add(id(result))
+            record = timings.get(id(result), _CallRecord())
+            input_tokens, output_tokens = _tokens(result.costs)
+            # stacks hold self values; the prompt sections take their share of the input tokens
+            charged = self._charge_sections(result, stack, input_tokens)
+            self.stacks[stack].add(
+                NodeStats(
+                    calls=1,
+                    wall_ms=record.wall_ms,
+                    queue_ms=max(record.wall_ms - record.backend_ms, 0.0) if record.backend_calls else 0.0,
+                    input_tokens=input_tokens - charged,
+                    output_tokens=output_tokens,
+                    retries=max(record.backend_calls - 1, 0),
+                )
+            )
+            # keep going: calls this one was built from (e.g. ``history=``) are counted beneath it
+        for parent in _parents(result):
+            self._walk(parent, stack, timings, seen)
+
+    def _charge_sections(self, llm_result, stack, input_tokens):
+        sections = [p for p in _parents(llm_result) if hasattr(p, "value") and not _is_llm_call(p)]
+        weights = [_text_length(p) for p in sections]
+        total = sum(weights)
+        if not total:
+            return 0
+        for section, weight in zip(sections, weights):
+            if weight:
+                self._charge(section, stack, input_tokens * weight / total)
+        return input_tokens
+
+    def _charge(self, result, stack, tokens):
+        """Split ``tokens`` between a rendered node and the nodes it was rendered from.
+
+        Children take their share by rendered length; whatever the node adds
+        itself (headings, padding, raw-string paragraphs) stays with it.
+        """
+        stack = stack + (frame_name(getattr(result, "op", None)),)
+        parents = [p for p in _parents(result) if not _is_llm_call(p)]
+        children = [p for p in parents if hasattr(p, "value")]
+        weights = [_text_length(p) for p in children]
+        text = sum(len(str(p)) for p in parents if not hasattr(p, "value"))
+        total = max(_text_length(result), sum(weights) + text)
+        if not total:
+            self.stacks[stack].add(NodeStats(input_tokens=tokens))
+            return
+        for child, weight in zip(children, weights):
+            if weight:
+                self._charge(child, stack, tokens * weight / total)
+        own = tokens * (1 - sum(weights) / total)
+        if own > 1e-9:
+            self.stacks[stack].add(NodeStats(input_tokens=own))
+
+    def totals(self):
+        """Inclusive metrics per node name, summed over every stack it appears in."""
+        totals = defaultdict(NodeStats)
+        for stack, stats in self.stacks.items():
+            for name in dict.fromkeys(stack):
+                totals[name].add(stats)
+        return dict(totals)
+
+    def report(self, sort_by="wall_ms"):
+        rows = sorted(self.totals().items(), key=lambda kv: getattr(kv[1], sort_by), reverse=True)
+        lines = [f"{'node':<40}{'calls':>8}{'wall s':>10}{'queue s':>10}{'in tok':>10}{'out tok':>10}{'retries':>9}"]
+        for name, s in rows:
+            lines.append(
+                f"{name:<40}{s.calls:>8}{s.wall_ms / 1000:>10.2f}{s.queue_ms / 1000:>10.2f}"
+                f"{s.input_tokens:>10.0f}{s.output_tokens:>10.0f}{s.retries:>9}"
+            )
+        return "\n".join(lines)
+
+    def to_folded(self, metric="wall_ms"):
+        """Brendan Gregg's folded-stack format, one ``a;b;c <weight>`` line per stack."""
+        lines = []
+        for stack, stats in sorted(self.stacks.items()):
+            weight = round(getattr(stats, metric))
+            if weight > 0:
+                lines.append(f"{';'.join(stack)} {weight}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self, name="sammo run"):
+        """Speedscope JSON with one sampled profile per metric."""
+        frames, index = [], {}
+        for stack in self.stacks:
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame})
+        profiles = []
+        for metric, unit in [("wall_ms", "milliseconds"), ("queue_ms", "milliseconds"),
+                             ("input_tokens", "none"), ("output_tokens", "none"), ("retries", "none")]:
+            samples, weights = [], []
+            for stack, stats in self.stacks.items():
+                value = getattr(stats, metric)
+                if value > 0:
+                    samples.append([index[f] for f in stack])
+                    weights.append(value)
+            profiles.append({
+                "type": "sampled",
+                "name": f"{name}: {metric}",
+                "unit": unit,
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "prompt-optimisation/profiling.py",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def save_speedscope(self, path, name="sammo run"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_speedscope(name), f)
+
+    def save_folded(self, path, metric="wall_ms"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_folded(metric))
+
+
+class RunProfiler:
+    """Context manager that times a runner's LLM calls and collects every ``Output`` run.
+
+    The runner is instrumented in place, so a runner already handed to a
+    ``BeamSearch`` is profiled too. Queue wait is the part of each
+    ``generate_text`` call not spent in the backend request (rate limiting
+    and scheduling). Retries are backend requests beyond the first.
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.profile = RunProfile()
+        self._timings = {}
+        self._keepalive = []
+        self._patched = []
+
+    def __enter__(self):
+        from sammo.components import Output
+
+        runner, timings, keepalive = self.runner, self._timings, self._keepalive
+        generate_text = runner.generate_text
+
+        async def timed_generate_text(*args, **kwargs):
+            record = _CallRecord()
+            token = _current_call.set(record)
+            start = time.perf_counter()
+            try:
+                result = await generate_text(*args, **kwargs)
+            finally:
+                record.wall_ms = (time.perf_counter() - start) * 1000
+                _current_call.reset(token)
+            # keep the result alive so its id can't be reused while profiling
+            timings[id(result)] = record
+            keepalive.append(result)
+            return result
+
+        self._patch(runner, "generate_text", timed_generate_text)
+
+        call_backend = getattr(runner, "_call_backend", None)
+        if call_backend is not None:
+            async def timed_call_backend(*args, **kwargs):
+                record = _current_call.get()
+                start = time.perf_counter()
+                try:
+                    return await call_backend(*args, **kwargs)
+                finally:
+                    if record is not None:
+                        record.backend_ms += (time.perf_counter() - start) * 1000
+                        record.backend_calls += 1
+
+            self._patch(runner, "_call_backend", timed_call_backend)
+
+        method = "arun" if hasattr(Output, "arun") else "run"
+        original = getattr(Output, method)
+        profile = self.profile
+
+        if method == "arun":
+            async def collecting_run(output, *args, **kwargs):
+                table = await original(output, *args, **kwargs)
+                profile.add_table(table, timings)
+                return table
+        else:
+            def collecting_run(output, *args, **kwargs):
+                table = original(output, *args, **kwargs)
+                profile.add_table(table, timings)
+                return table
+
+        self._patched.append((Output, method, original, True))
+        setattr(Output, method, collecting_run)
+        return self.profile
+
+    def _patch(self, obj, name, replacement):
+        self._patched.append((obj, name, obj.__dict__.get(name), False))
+        setattr(obj, name, replacement)
+
+    def __exit__(self, *exc):
+        for obj, name, original, is_class in reversed(self._patched):
+            if original is None and not is_class:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, original)
+        self._patched.clear()
+        self._timings.clear()
+        self._keepalive.clear()
+        return False
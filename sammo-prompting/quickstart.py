@@ -1,14 +1,7 @@
 # %load -r 3:25 _init.py
-import pathlib
 import sammo
 from sammo.runners import OpenAIChat
-from sammo.base import Template, EvaluationScore
-from sammo.components import Output, GenerateText, ForEach, Union
-from sammo.extractors import ExtractRegex
-from sammo.data import DataTable
-import json
-import requests
-import os
+from sammo.components import Output, GenerateText
 
 _ = sammo.setup_logger("WARNING")  # we're only interested in warnings for now
 
@@ -0,0 +1,216 @@
+"""Embedding-similarity cache for labelling near-identical transaction descriptions.
+
+Bank feeds are full of near-variants ("withdrew cash for weekend expenses",
+"withdrew cash for the weekend") that an exact-match cache never hits.
+``SemanticLabelCache`` embeds inputs in batches, looks them up in an in-memory
+index of already labelled rows and reuses the label of the nearest neighbour
+when its cosine similarity is above ``threshold``. Only the misses go to the LLM.
+
+    cache = SemanticLabelCache(sammo_embedder(embedder))
+    report = cache.calibrate(d_fewshot.inputs.values, d_fewshot.outputs.values, baseline_accuracy=0.9)
+    print(report)  # pick the threshold from the held-out numbers; it is set to the best one
+
+    labels = cached_labels(cache, Output(...), runner, d_train)
+    print(cache.stats)
+
+``embed`` is any callable mapping a list of strings to a list of vectors; see
+``sammo_embedder`` (SAMMO's ``OpenAIEmbedding``) and ``local_embedder``
+(sentence-transformers).
+"""
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self):
+        return f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.1%} hit rate)"
+
+
+def sammo_embedder(embedder):
+    """Wrap a SAMMO embedding runner such as ``OpenAIEmbedding`` (its cache still applies)."""
+    from sammo.utils import sync
+
+    def embed(texts):
+        return list(sync(embedder.generate_embedding(list(texts))).value)
+
+    return embed
+
+
+def local_embedder(model_name="all-MiniLM-L6-v2"):
+    """Embed on the local CPU/GPU with sentence-transformers."""
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    return lambda texts: model.encode(list(texts), batch_size=64)
+
+
+def _is_empty(label):
+    return label is None or label == ""
+
+
+class SemanticLabelCache:
+    def __init__(self, embed, threshold=0.92, batch_size=256):
+        self.embed = embed
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.labels = []
+        self._vectors = None
+        self.stats = CacheStats()
+
+    def _embed(self, texts):
+        import numpy as np
+
+        chunks = [self.embed(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        vectors = np.asarray([v for chunk in chunks for v in chunk], dtype=np.float32).reshape(len(texts), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _nearest(self, vectors):
+        import numpy as np
+
+        if self._vectors is None or not len(vectors):
+            return np.full(len(vectors), -1), np.full(len(vectors), -1.0)
+        sims = vectors @ self._vectors.T
+        best = sims.argmax(axis=1)
+        return best, sims[np.arange(len(vectors)), best]
+
+    def _add_vectors(self, vectors, labels):
+        import numpy as np
+
+        # failed rows come back empty; indexing them would serve "" to their near-variants
+        keep = [i for i, label in enumerate(labels) if not _is_empty(label)]
+        if not keep:
+            return
+        vectors = vectors[keep]
+        self._vectors = vectors if self._vectors is None else np.vstack([self._vectors, vectors])
+        self.labels.extend(labels[i] for i in keep)
+
+    def add(self, texts, labels):
+        """Index labelled rows; empty labels are skipped."""
+        texts = list(texts)
+        if texts:
+            self._add_vectors(self._embed(texts), list(labels))
+
+    def _leaders(self, vectors):
+        """For each row, the first earlier row it is a near-variant of (or itself)."""
+        import numpy as np
+
+        sims = vectors @ vectors.T
+        leaders, leader_of = [], []
+        for i in range(len(vectors)):
+            row = sims[i, leaders] if leaders else np.empty(0)
+            if len(row) and row.max() >= self.threshold:
+                leader_of.append(leaders[int(row.argmax())])
+            else:
+                leaders.append(i)
+                leader_of.append(i)
+        return leader_of
+
+    def _ask(self, texts, label_misses):
+        unique = list(dict.fromkeys(texts))
+        return dict(zip(unique, label_misses(unique))) if unique else {}
+
+    def label(self, texts, label_misses):
+        """Label ``texts``, calling ``label_misses(list_of_texts) -> labels`` only for cache misses.
+
+        Rows are taken ``batch_size`` at a time. Within a batch, misses are
+        grouped with their near-variants and only the first of each group is
+        sent; the rest reuse its label. A group whose label comes back empty
+        has its other members sent too. New non-empty labels are indexed
+        before the next batch, so later near-variants hit.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self._embed(texts)
+        out = [None] * len(texts)
+        for start in range(0, len(texts), self.batch_size):
+            rows = list(range(start, min(start + self.batch_size, len(texts))))
+            best, sims = self._nearest(vectors[rows])
+            missed = []
+            for i, b, s in zip(rows, best, sims):
+                if s >= self.threshold:
+                    out[i] = self.labels[b]
+                else:
+                    missed.append(i)
+            if not missed:
+                self.stats.hits += len(rows)
+                continue
+
+            leader_of = dict(zip(missed, (missed[j] for j in self._leaders(vectors[missed]))))
+            asked = self._ask([texts[i] for i in missed if leader_of[i] == i], label_misses)
+            retry = [i for i in missed if _is_empty(asked[texts[leader_of[i]]]) and texts[i] not in asked]
+            asked.update(self._ask([texts[i] for i in retry], label_misses))
+            sent = set()
+            for i in missed:
+                if texts[i] in asked:
+                    out[i] = asked[texts[i]]
+                    sent.add(i)
+                else:
+                    out[i] = asked[texts[leader_of[i]]]
+            self.stats.hits += len(rows) - len(sent)
+            self.stats.misses += len(sent)
+
+            first = {}
+            for i in sorted(sent):
+                first.setdefault(texts[i], i)
+            self._add_vectors(vectors[list(first.values())], [out[i] for i in first.values()])
+        return out
+
+    def calibrate(self, texts, labels, thresholds=(0.80, 0.85, 0.88, 0.90, 0.92, 0.94, 0.96, 0.98),
+                  holdout=0.3, baseline_accuracy=1.0, max_accuracy_drop=0.01, seed=0):
+        """Pick ``threshold`` on a held-out split of labelled data.
+
+        The first ``1 - holdout`` of a seeded shuffle is indexed and the rest is
+        looked up. For each threshold the report gives the hit rate, the
+        accuracy of reused labels, and the change in overall accuracy relative
+        to labelling everything with the LLM (whose accuracy is
+        ``baseline_accuracy``). The lowest threshold whose drop stays within
+        ``max_accuracy_drop`` is kept; the index is left empty afterwards.
+        """
+        import random
+
+        import numpy as np
+
+        pairs = list(zip(texts, labels))
+        random.Random(seed).shuffle(pairs)
+        split = int(len(pairs) * (1 - holdout))
+        indexed, held_out = pairs[:split], pairs[split:]
+        vectors = self._embed([t for t, _ in pairs])
+        self._vectors, self.labels = vectors[:split], [label for _, label in indexed]
+        best, sims = self._nearest(vectors[split:])
+        self._vectors, self.labels = None, []
+
+        truth = np.asarray([label for _, label in held_out], dtype=object)
+        reused = np.asarray([label for _, label in indexed], dtype=object)[best]
+        report, chosen = [], None
+        for threshold in sorted(thresholds):
+            hit = sims >= threshold
+            hit_rate = float(hit.mean()) if len(hit) else 0.0
+            hit_accuracy = float((reused[hit] == truth[hit]).mean()) if hit.any() else float("nan")
+            delta = hit_rate * (hit_accuracy - baseline_accuracy) if hit.any() else 0.0
+            report.append({"threshold": threshold, "hit_rate": hit_rate,
+                           "hit_accuracy": hit_accuracy, "accuracy_delta": delta})
+            if chosen is None and delta >= -max_accuracy_drop:
+                chosen = threshold
+        self.threshold = chosen if chosen is not None else max(thresholds)
+        return report
+
+
+def cached_labels(cache, program, runner, table):
+    """Run a SAMMO labelling ``Output`` on a DataTable, sending only cache misses to the LLM."""
+    from sammo.data import DataTable
+
+    def label_misses(texts):
+        result = program.run(runner, DataTable(texts))
+        return result.outputs.normalized_values(on_empty="")
+
+    return cache.label(table.inputs.values, label_misses)
@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+from trace_retention import TraceLog, TraceRetention
+
+
+def _minibatch(rows=2):
+    """``rows`` outputs extracted from one LLM call, as ``Output.run`` returns them."""
+    prompt = SimpleNamespace(value="# Instructions\nLabel each row.", parent=None, op=None)
+    call = SimpleNamespace(value='[{"id":0,"output":"Food"}]', request_text="full request", history=None,
+                           extra_data=None, costs=SimpleNamespace(input=10, output=5), parent=prompt, op=None)
+    results = [SimpleNamespace(value=f"label{i}", parent=call, op=None) for i in range(rows)]
+    return SimpleNamespace(outputs=SimpleNamespace(raw_values=results)), call
+
+
+def test_shared_call_is_logged_whole_for_every_row(tmp_path):
+    table, call = _minibatch(rows=3)
+    log = TraceLog(str(tmp_path / "run.traces"))
+    TraceRetention("none", log=log).apply(table)
+
+    for row in range(3):
+        (trace,) = log.load(0, row)["parents"]
+        assert trace["request_text"] == "full request"
+        assert trace["parents"][0]["value"] == "# Instructions\nLabel each row."
+    assert call.request_text is None and call.parent is None
+    assert all(result.parent is call for result in table.outputs.raw_values)
+
+
+def test_kept_row_keeps_the_call_it_shares():
+    table, call = _minibatch(rows=2)
+    table.outputs.raw_values[1].value = ""  # failed row, kept by the "errors" policy
+    retention = TraceRetention("errors")
+    retention.apply(table)
+
+    assert retention.evicted == 1
+    assert call.request_text == "full request" and call.parent is not None
+    assert table.outputs.raw_values[0].parent is call
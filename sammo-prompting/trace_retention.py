@@ -0,0 +1,220 @@
+"""Bound the memory held by SAMMO call traces in large runs and searches.
+
+Every row of an ``Output.run`` result keeps its full call trace, including the
+raw LLM requests behind ``result.outputs.llm_requests`` and
+``plot_call_trace()``. On multi-thousand-row runs and long ``BeamSearch`` fits
+these dominate process memory. ``TraceRetention`` applies a policy to every
+table produced while it is active:
+
+- ``"full"``: keep every trace (SAMMO's default behaviour),
+- ``"sampled"``: keep one row in ``sample_every``,
+- ``"errors"``: keep only rows that failed or came back empty,
+- ``"none"``: keep no traces.
+
+An evicted row keeps only the LLM calls beneath it, stripped of their
+rendered prompt chain, request text, history and raw response. Their costs
+stay, so ``input_cost`` / ``output_cost`` and ``show_report()`` are still
+complete. If a ``log`` path is given, the full trace is first appended to a
+compact on-disk log (zlib-compressed JSON records). It can be reloaded on
+demand for debugging:
+
+    with TraceRetention("errors", log="fit.traces") as traces:
+        prompt_optimizer.fit(d_train)
+    prompt_optimizer.show_report()  # costs and scores are unaffected
+    print(traces.log.load(run=0, row=17))  # full trace of an evicted row
+
+    log = TraceLog.open("fit.traces")  # later, from another process
+    for key, trace in log:
+        ...
+
+Enter it inside a ``RunProfiler`` block if you profile the same run, so the
+profiler sees the traces before they are evicted.
+"""
+import json
+import struct
+import zlib
+
+from profiling import _is_llm_call, _parents, frame_name
+
+POLICIES = ("full", "sampled", "errors", "none")
+
+_HEADER = struct.Struct(">II")  # run, payload length; row follows inside the payload
+
+_HEAVY = ("request_text", "history", "extra_data")
+
+
+def is_error(result):
+    if result is None or type(result).__name__ == "EmptyResult":
+        return True
+    value = getattr(result, "value", None)
+    return value is None or value == "" or value == [] or isinstance(value, Exception)
+
+
+def llm_calls(result):
+    """The LLM call results beneath ``result`` (not including itself), each once."""
+    calls, seen, stack = [], set(), list(_parents(result))
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if _is_llm_call(node):
+            calls.append(node)
+        stack.extend(_parents(node))
+    return calls
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def trace_to_dict(result):
+    """A plain-data copy of a call trace, enough to inspect prompts, outputs and costs offline."""
+    node = {"op": frame_name(getattr(result, "op", None)), "value": _jsonable(getattr(result, "value", None))}
+    for attr in ("request_text", "fingerprint", "retries"):
+        value = getattr(result, attr, None)
+        if value is not None:
+            node[attr] = _jsonable(value)
+    costs = getattr(result, "costs", None)
+    if costs is not None:
+        node["costs"] = {"input": getattr(costs, "input", None), "output": getattr(costs, "output", None)}
+    parents = _parents(result)
+    if parents:
+        node["parents"] = [trace_to_dict(p) for p in parents]
+    return node
+
+
+class TraceLog:
+    """Append-only file of compressed traces, indexed by ``(run, row)``."""
+
+    def __init__(self, path, mode="ab"):
+        self.path = path
+        self._file = open(path, mode)
+        self.index = {}
+
+    @classmethod
+    def open(cls, path):
+        log = cls(path, "ab")
+        with open(path, "rb") as f:
+            while header := f.read(_HEADER.size):
+                run, length = _HEADER.unpack(header)
+                offset = f.tell() - _HEADER.size
+                row = json.loads(zlib.decompress(f.read(length)))["row"]
+                log.index[(run, row)] = offset
+        return log
+
+    def append(self, run, row, trace):
+        payload = zlib.compress(json.dumps({"row": row, "trace": trace}, ensure_ascii=False).encode("utf-8"))
+        self._file.seek(0, 2)
+        self.index[(run, row)] = self._file.tell()
+        self._file.write(_HEADER.pack(run, len(payload)) + payload)
+
+    def _read(self, offset):
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            _, length = _HEADER.unpack(f.read(_HEADER.size))
+            return json.loads(zlib.decompress(f.read(length)))["trace"]
+
+    def load(self, run, row):
+        return self._read(self.index[(run, row)])
+
+    def __iter__(self):
+        for key, offset in sorted(self.index.items()):
+            yield key, self._read(offset)
+
+    def close(self):
+        self._file.close()
+
+
+class TraceRetention:
+    def __init__(self, policy="errors", log=None, sample_every=100):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        self.policy = policy
+        self.sample_every = sample_every
+        self.log = TraceLog(log) if isinstance(log, str) else log
+        self.runs = 0
+        self.evicted = 0
+        self._rows_seen = 0
+        self._original = None
+
+    def keep(self, result):
+        if self.policy == "full":
+            return True
+        if self.policy == "sampled":
+            return self._rows_seen % self.sample_every == 0
+        if self.policy == "errors":
+            return is_error(result)
+        return False
+
+    def apply(self, table):
+        """Evict the traces of ``table``'s rows that the policy doesn't keep. Returns the table."""
+        run = self.runs
+        self.runs += 1
+        if self.policy == "full":
+            return table
+        rows = table.outputs.raw_values
+        kept = []
+        for result in rows:
+            kept.append(result is None or self.keep(result))
+            self._rows_seen += 1
+        # rows of a minibatch share the LLM call beneath them; leave the calls of kept rows whole
+        shared = {id(call) for result, keep in zip(rows, kept) if keep and result is not None
+                  for call in [result, *llm_calls(result)]}
+        evicted = [(row, result) for row, (result, keep) in enumerate(zip(rows, kept)) if not keep]
+        # log every evicted row before detaching any: detaching strips the calls the next rows share
+        if self.log is not None:
+            for row, result in evicted:
+                self.log.append(run, row, trace_to_dict(result))
+        for _, result in evicted:
+            self._detach(result, shared)
+        self.evicted += len(evicted)
+        return table
+
+    @staticmethod
+    def _strip(result, shared):
+        if id(result) in shared:
+            return
+        for attr in _HEAVY:
+            if getattr(result, attr, None) is not None:
+                setattr(result, attr, None)
+
+    def _detach(self, result, shared):
+        """Point the row straight at its LLM calls, which carry the costs, and drop everything else."""
+        calls = llm_calls(result)
+        for call in calls:
+            if id(call) not in shared:
+                call.parent = None
+            self._strip(call, shared)
+        self._strip(result, shared)
+        result.parent = calls[0] if len(calls) == 1 else (calls or None)
+
+    def __enter__(self):
+        from sammo.components import Output
+
+        method = "arun" if hasattr(Output, "arun") else "run"
+        original = getattr(Output, method)
+        retention = self
+
+        if method == "arun":
+            async def retaining_run(output, *args, **kwargs):
+                return retention.apply(await original(output, *args, **kwargs))
+        else:
+            def retaining_run(output, *args, **kwargs):
+                return retention.apply(original(output, *args, **kwargs))
+
+        self._original = (Output, method, original)
+        setattr(Output, method, retaining_run)
+        return self
+
+    def __exit__(self, *exc):
+        cls, method, original = self._original
+        setattr(cls, method, original)
+        if self.log is not None:
+            self.log._file.flush()
+        return False
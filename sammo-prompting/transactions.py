@@ -0,0 +1,66 @@
+"""Transaction classification data and scoring shared by the SAMMO notebooks.
+
+sammo and pandas are imported inside the functions that use them, so this
+module can be imported by short-lived workers and CLIs without loading the
+SAMMO component and search stack up front.
+"""
+from pathlib import Path
+
+DATA_FILE = Path(__file__).resolve().parent / "transaction_data_with_classifications.csv"
+
+INSTRUCTIONS = "Determine how to classify these transactions."
+
+LABELS = ["Rent", "Bills", "Other", "Food", "Entertainment", "Utilities", "Salary", "Taxes", "Insurance", "Unknown"]
+
+
+def load_data(path=DATA_FILE):
+    import pandas as pd
+    from sammo.data import DataTable
+
+    df = pd.read_csv(path)
+    mydata = DataTable.from_pandas(df, input_fields="description", output_fields="classification",
+                                   constants={"instructions": INSTRUCTIONS})
+    return mydata
+
+
+def accuracy(y_true, y_pred):
+    from sammo.base import EvaluationScore
+
+    y_true = y_true.outputs.values
+    y_pred = y_pred.outputs.values
+    n_correct = sum([y_p == y_t for y_p, y_t in zip(y_pred, y_true)])
+    return EvaluationScore(n_correct / len(y_true))
+
+
+def make_runner(**kwargs):
+    """The notebooks' gpt-4o-mini runner, configured from ``OPENAI_API_KEY`` and ``CACHE_FILE``."""
+    import os
+
+    from sammo.runners import OpenAIChat
+
+    kwargs.setdefault("model_id", "gpt-4o-mini")
+    if "api_config" not in kwargs:
+        kwargs["api_config"] = {"api_key": os.environ["OPENAI_API_KEY"]}
+    kwargs.setdefault("cache", os.getenv("CACHE_FILE", "cache.tsv"))
+    kwargs.setdefault("timeout", 30)
+    return OpenAIChat(**kwargs)
+
+
+def labeling_program(instructions=INSTRUCTIONS, labels=LABELS, fewshot_seed=43):
+    """The minibatched MetaPrompt labeler from sammo-optimize, as an ``Output`` program."""
+    from sammo.components import Output
+    from sammo.dataformatters import QuestionAnswerFormatter
+    from sammo.instructions import FewshotExamples, InputData, MetaPrompt, Paragraph, Section
+
+    mydata = load_data()
+    mprompt = MetaPrompt(
+        [
+            Section("Instructions", instructions),
+            Section("Examples", FewshotExamples(mydata.sample(3, seed=fewshot_seed))),
+            Paragraph(f"\nOutput labels: {', '.join(labels)}"),
+            Paragraph(InputData()),
+        ],
+        render_as="markdown",
+        data_formatter=QuestionAnswerFormatter(labels),
+    )
+    return Output(mprompt.with_extractor("empty_result"), minibatch_size=5, on_error="empty_result")
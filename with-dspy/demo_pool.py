@@ -0,0 +1,261 @@
+"""Bootstrap demos once, in parallel, and share them across candidate programs.
+
+``BootstrapFewShotWithRandomSearch(num_candidate_programs=16, teacher_settings=...)``
+and MIPRO's demo candidates each run ``BootstrapFewShot`` on a reshuffled
+training set. Every one of those runs traces the teacher over the training
+examples again, and because each teacher gets a different set of labelled
+demos its prompts miss DSPy's cache. Teacher calls are the slowest and most
+expensive part of ``compile``.
+
+A ``DemoPool`` runs the teacher once per training example, in a thread pool
+behind a shared rate limit, and stores each example's trace (and whether it
+passed the metric) under a key made from the program's signatures, the
+teacher model and its number of labelled demos. While ``use_demo_pool`` is
+active, every ``BootstrapFewShot`` created by the optimizers fills the pool
+on its first compile and then takes its demos from it:
+
+    demo_pool = DemoPool(num_threads=8, rate_limit=5, path="demo_pool.json")
+    with use_demo_pool(demo_pool):
+        cot_compiled = optimizer.compile(CoT(), trainset=trainset, valset=testset)
+    print(demo_pool.stats)
+
+Candidates still differ in which examples (and how many) they use, since
+``BootstrapFewShot`` walks its own shuffled training set. What they share is
+the single teacher run per example. That teacher's labelled demos are drawn
+from the training set in a fixed order rather than from each candidate's
+shuffle. The calling ``BootstrapFewShot``'s ``metric_threshold`` and
+``max_errors`` apply as they would to its own bootstrapping.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZER_MODULES = (
+    "dspy.teleprompt.random_search",
+    "dspy.teleprompt.mipro_optimizer",
+    "dspy.teleprompt.signature_opt_bayesian",
+)
+
+
+class RateLimiter:
+    """Spaces calls ``1 / calls_per_second`` apart across every thread that shares it."""
+
+    def __init__(self, calls_per_second):
+        self.interval = 1.0 / calls_per_second
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+@dataclass
+class PoolStats:
+    teacher_traces: int = 0
+    reused: int = 0
+    errors: int = 0
+
+    def __str__(self):
+        return (f"{self.teacher_traces} teacher traces ({self.errors} errors), "
+                f"{self.reused} demo lookups served from the pool")
+
+
+def _digest(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def example_key(example):
+    return _digest(example.toDict())
+
+
+def program_key(program, teacher_settings=None, max_labeled_demos=0, metric_threshold=None):
+    """Key for ``program``'s predictor signatures, the teacher LM, its labelled demo count and the pass threshold."""
+    import dspy
+
+    signatures = []
+    for name, predictor in program.named_predictors():
+        signature = getattr(predictor, "extended_signature", predictor.signature)
+        signatures.append([name, signature.instructions, list(signature.input_fields), list(signature.output_fields)])
+    lm = (teacher_settings or {}).get("lm") or dspy.settings.lm
+    return _digest([signatures, getattr(lm, "kwargs", {}).get("model"), max_labeled_demos, metric_threshold])
+
+
+class DemoPool:
+    def __init__(self, metric=None, num_threads=8, rate_limit=None, path=None):
+        self.metric = metric
+        self.num_threads = num_threads
+        self.rate_limit = RateLimiter(rate_limit) if isinstance(rate_limit, (int, float)) else rate_limit
+        self.path = path
+        self.entries = {}  # "program/example/round" -> [passed metric, {predictor name: [demo dicts]}]
+        self.stats = PoolStats()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def _key(pkey, example, round_idx):
+        return f"{pkey}/{example_key(example)}/{round_idx}"
+
+    def get(self, pkey, example, round_idx=0):
+        entry = self.entries.get(self._key(pkey, example, round_idx))
+        if entry is not None:
+            with self._lock:
+                self.stats.reused += 1
+        return entry
+
+    def _needs_round(self, pkey, example, round_idx):
+        """Whether ``example`` is still untraced at ``round_idx`` and failed every earlier round."""
+        if self._key(pkey, example, round_idx) in self.entries:
+            return False
+        earlier = [self.entries.get(self._key(pkey, example, r)) for r in range(round_idx)]
+        return all(entry is not None and not entry[0] for entry in earlier)
+
+    @staticmethod
+    def _teacher(student, teacher, trainset, max_labeled_demos):
+        # as in BootstrapFewShot, but the labelled demos come from a fixed order of the
+        # training set, so every candidate shares one teacher
+        from dspy.teleprompt import LabeledFewShot
+
+        teacher = teacher.deepcopy() if teacher is not None else student.reset_copy()
+        if max_labeled_demos and getattr(teacher, "_compiled", False) is False:
+            ordered = sorted(trainset, key=example_key)
+            teacher = LabeledFewShot(k=max_labeled_demos).compile(teacher.reset_copy(), trainset=ordered)
+        return teacher
+
+    def _passed(self, example, prediction, trace, metric_threshold):
+        # as in BootstrapFewShot: a threshold turns the metric value into pass/fail
+        if self.metric is None:
+            return True
+        value = self.metric(example, prediction, trace)
+        return bool(value >= metric_threshold if metric_threshold else value)
+
+    def _trace(self, teacher, example, round_idx, teacher_settings, metric_threshold, errors):
+        import dspy
+
+        if self.rate_limit is not None:
+            self.rate_limit.acquire()
+        teacher = teacher.deepcopy()  # demos are edited per example, so each thread gets its own copy
+        names = {id(predictor): name for name, predictor in teacher.named_predictors()}
+        for _, predictor in teacher.named_predictors():
+            predictor.demos = [demo for demo in predictor.demos if demo != example]
+        try:
+            with dspy.context(trace=[], **teacher_settings):
+                lm = dspy.settings.lm
+                new_settings = dict(lm=lm.copy(temperature=0.7 + 0.001 * round_idx)) if round_idx > 0 else {}
+                with dspy.context(**new_settings):
+                    prediction = teacher(**example.inputs())
+                    trace = dspy.settings.trace
+                    passed = self._passed(example, prediction, trace, metric_threshold)
+        except Exception as e:
+            with self._lock:
+                self.stats.errors += 1
+                errors["count"] += 1
+                count = errors["count"]
+            if count >= errors["max"]:
+                raise
+            logger.error("Failed to run or to evaluate example %s with %s due to %s.", example, self.metric, e)
+            passed, trace = False, []
+        demos = {}
+        if passed:
+            for predictor, inputs, outputs in trace:
+                if id(predictor) in names:
+                    demos.setdefault(names[id(predictor)], []).append({**inputs, **outputs})
+        return [passed, demos]
+
+    def bootstrap(self, student, trainset, teacher=None, teacher_settings=None, max_labeled_demos=16, max_rounds=1,
+                  metric_threshold=None, max_errors=5):
+        """Trace the teacher over each example of ``trainset`` the pool doesn't have yet. Returns the program key.
+
+        As in ``BootstrapFewShot``, an example passes when the metric is truthy,
+        or at least ``metric_threshold`` if one is given. Teacher or metric
+        errors count as failures and are logged; the ``max_errors``-th is raised.
+        """
+        teacher_settings = teacher_settings or {}
+        pkey = program_key(student, teacher_settings, max_labeled_demos, metric_threshold)
+        errors = {"count": 0, "max": max_errors}
+        examples = list({example_key(example): example for example in trainset}.values())
+        teacher_program = None
+        for round_idx in range(max_rounds):
+            todo = [example for example in examples if self._needs_round(pkey, example, round_idx)]
+            if not todo:
+                continue
+            teacher_program = teacher_program or self._teacher(student, teacher, trainset, max_labeled_demos)
+            with ThreadPoolExecutor(self.num_threads) as executor:
+                results = list(executor.map(
+                    lambda example: self._trace(teacher_program, example, round_idx, teacher_settings,
+                                                metric_threshold, errors), todo))
+            with self._lock:
+                for example, entry in zip(todo, results):
+                    self.entries[self._key(pkey, example, round_idx)] = entry
+                self.stats.teacher_traces += len(todo)
+        if self.path:
+            self.save()
+        return pkey
+
+    def save(self, path=None):
+        with open(path or self.path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+
+
+def pooled_bootstrap_fewshot(pool):
+    """A ``BootstrapFewShot`` subclass that fills ``pool`` in parallel and takes its demos from it."""
+    import dspy
+    from dspy.teleprompt import BootstrapFewShot
+
+    class PooledBootstrapFewShot(BootstrapFewShot):
+        def compile(self, student, *, teacher=None, trainset):
+            if pool.metric is None:
+                pool.metric = self.metric
+            self._pool_key = pool.bootstrap(student, trainset, teacher, self.teacher_settings,
+                                            self.max_labeled_demos, self.max_rounds,
+                                            getattr(self, "metric_threshold", None), getattr(self, "max_errors", 5))
+            return super().compile(student, teacher=teacher, trainset=trainset)
+
+        def _bootstrap_one_example(self, example, round_idx=0):
+            entry = pool.get(self._pool_key, example, round_idx)
+            if entry is None:
+                return super()._bootstrap_one_example(example, round_idx)
+            passed, demos = entry
+            if passed:
+                for name, rows in demos.items():
+                    if name in self.name2traces:
+                        self.name2traces[name].extend(dspy.Example(augmented=True, **row) for row in rows)
+            return passed
+
+    return PooledBootstrapFewShot
+
+
+@contextmanager
+def use_demo_pool(pool, modules=OPTIMIZER_MODULES):
+    """Make the optimizers in ``modules`` bootstrap through ``pool`` while the block runs."""
+    import importlib
+
+    pooled = pooled_bootstrap_fewshot(pool)
+    patched = []
+    for name in modules:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+        if hasattr(module, "BootstrapFewShot"):
+            patched.append((module, module.BootstrapFewShot))
+            module.BootstrapFewShot = pooled
+    try:
+        yield pool
+    finally:
+        for module, original in patched:
+            module.BootstrapFewShot = original
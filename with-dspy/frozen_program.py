@@ -0,0 +1,196 @@
+"""Freeze a compiled DSPy program into a flat prompt template for serving.
+
+A ``compiled_program`` re-assembles its signature, instructions and demos into
+a prompt on every forward call. ``freeze`` runs it once with placeholder
+inputs against a recording LM (no requests are sent) and keeps only the
+literal prompt text around the input slots, with the demo text already
+rendered in. It pairs this with a parser for the signature's output fields:
+
+    frozen = freeze(compiled_program, input_keys=("topic", "joke"))
+    frozen.save("funeval.frozen.json")
+
+    # on the serving worker: stdlib only, no dspy import
+    frozen = FrozenProgram.load("funeval.frozen.json")
+    prompt = frozen.render(topic="food", joke="...")
+    fields = frozen.parse(completion_text)  # {"rationale": ..., "answer": ...}
+    fields = frozen(complete, topic="food", joke="...")  # complete(prompt, **frozen.request) -> text
+
+    print(benchmark(frozen, devset[0].inputs(), original=compiled_program))
+
+Inputs that ``forward`` fixes itself (``CoT`` always asks the same
+``question``) end up in the static text. Only programs that make a single LM
+call per forward pass can be frozen.
+"""
+import json
+import re
+import time
+
+_SLOT = re.compile(r"FRZ(\d+)SLOT")
+_PROBE = "x  y\n\tz"
+
+ESCAPES = {
+    "raw": lambda s: s,
+    "collapse": lambda s: " ".join(s.split()),  # DSPy's default field format handler
+}
+
+
+def _clean(text):
+    return text.strip().rstrip("-").strip()
+
+
+class FrozenProgram:
+    """A flat prompt template plus an output-field parser; no dspy needed at runtime."""
+
+    def __init__(self, parts, slots, input_keys, output_fields, escape="collapse", request=None):
+        self.parts = list(parts)
+        self.slots = list(slots)
+        self.input_keys = list(input_keys)
+        self.output_fields = [tuple(field) for field in output_fields]  # (name, prefix)
+        self.escape = escape
+        self.request = dict(request or {})
+        self._escape = ESCAPES[escape]
+        self._separators = ["\n" + prefix for _, prefix in self.output_fields[1:]]
+
+    def render(self, **inputs):
+        values = [self._escape(str(inputs[key])) for key in self.input_keys]
+        out = [self.parts[0]]
+        for slot, part in zip(self.slots, self.parts[1:]):
+            out.append(values[slot])
+            out.append(part)
+        return "".join(out)
+
+    def parse(self, text):
+        """Split a completion into output fields the way DSPy's template does; missing fields are ``""``."""
+        fields = {name: "" for name, _ in self.output_fields}
+        raw = text.strip()
+        for (name, _), separator in zip(self.output_fields, self._separators + [None]):
+            if not raw:
+                break
+            offset = raw.find(separator) if separator else -1
+            if offset < 0:
+                fields[name] = _clean(raw)
+                break
+            fields[name] = _clean(raw[:offset])
+            raw = _clean(raw[offset + len(separator):])
+        return fields
+
+    def __call__(self, complete, **inputs):
+        return self.parse(complete(self.render(**inputs), **self.request))
+
+    def to_dict(self):
+        return {
+            "parts": self.parts,
+            "slots": self.slots,
+            "input_keys": self.input_keys,
+            "output_fields": self.output_fields,
+            "escape": self.escape,
+            "request": self.request,
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def _predictor(program):
+    predictors = [p for _, p in program.named_predictors()]
+    if len(predictors) != 1:
+        raise ValueError(f"can only freeze programs with a single predictor, got {len(predictors)}")
+    return predictors[0]
+
+
+def _output_fields(predictor):
+    signature = getattr(predictor, "extended_signature", predictor.signature)
+    return [(name, field.json_schema_extra["prefix"]) for name, field in signature.output_fields.items()]
+
+
+def _capture(program, inputs, output_fields, lm=None):
+    """Run ``program`` with a copy of the LM whose requests are recorded and answered locally."""
+    import copy
+
+    import dspy
+
+    lm = lm or dspy.settings.lm
+    canned = "frozen" + "".join(f"\n\n{prefix} frozen" for _, prefix in output_fields[1:])
+    calls = []
+
+    def basic_request(prompt, **kwargs):
+        calls.append((prompt, {**lm.kwargs, **kwargs}))
+        choice = {"message": {"content": canned}, "text": canned, "finish_reason": "stop"}
+        return {"choices": [choice], "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}}
+
+    recorder = copy.copy(lm)
+    recorder.history = []
+    recorder.basic_request = recorder.request = basic_request
+    with dspy.context(lm=recorder):
+        program(**inputs)
+    return calls
+
+
+def _render_once(program, inputs, output_fields, lm):
+    calls = _capture(program, inputs, output_fields, lm)
+    if len(calls) != 1:
+        raise ValueError(f"can only freeze programs that make one LM call per forward pass, got {len(calls)}")
+    return calls[0]
+
+
+def freeze(program, input_keys, lm=None):
+    """Freeze a (compiled) single-predictor DSPy program into a ``FrozenProgram``."""
+    input_keys = list(input_keys)
+    output_fields = _output_fields(_predictor(program))
+
+    probe_inputs = {key: "FRZPROBE" for key in input_keys}
+    probe_inputs[input_keys[0]] = f"FRZPROBEA{_PROBE}FRZPROBEB"
+    probe, _ = _render_once(program, probe_inputs, output_fields, lm)
+    found = re.search("FRZPROBEA(.*?)FRZPROBEB", probe, re.S)
+    escape = next((name for name, fn in ESCAPES.items() if found and fn(_PROBE) == found.group(1)), None)
+    if escape is None:
+        raise ValueError("the program transforms inputs in a way freeze can't reproduce")
+
+    prompt, kwargs = _render_once(program, {key: f"FRZ{i}SLOT" for i, key in enumerate(input_keys)},
+                                  output_fields, lm)
+    pieces = _SLOT.split(prompt)
+    request = {k: v for k, v in kwargs.items() if k != "model_type" and isinstance(v, (str, int, float, bool))}
+    return FrozenProgram(pieces[0::2], [int(i) for i in pieces[1::2]], input_keys, output_fields, escape, request)
+
+
+def verify(frozen, program, examples, lm=None):
+    """Check that ``frozen`` renders each example's inputs exactly as the program does."""
+    for example in examples:
+        inputs = {key: example[key] for key in frozen.input_keys}
+        prompt, _ = _render_once(program, inputs, frozen.output_fields, lm)
+        if frozen.render(**inputs) != prompt:
+            return False
+    return True
+
+
+def _per_call_us(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def benchmark(frozen, inputs, completion=None, number=10000, original=None, lm=None, original_number=50):
+    """Microseconds per render and per parse for one set of ``inputs``.
+
+    With ``original`` the program's own prompt assembly (forward pass against a
+    recording LM) is timed too, so the saving per request is visible.
+    """
+    inputs = {key: inputs[key] for key in frozen.input_keys}
+    if completion is None:
+        completion = "label" + "".join(f"\n\n{prefix} label" for _, prefix in frozen.output_fields[1:])
+    result = {
+        "render_us": _per_call_us(lambda: frozen.render(**inputs), number),
+        "parse_us": _per_call_us(lambda: frozen.parse(completion), number),
+    }
+    if original is not None:
+        result["original_render_us"] = _per_call_us(
+            lambda: _capture(original, inputs, frozen.output_fields, lm), original_number)
+        result["speedup"] = result["original_render_us"] / result["render_us"]
+    return result
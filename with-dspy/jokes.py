@@ -0,0 +1,61 @@
+"""Joke datasets used by the DSPy walkthroughs.
+
+The jokes live in ``data/*.jsonl`` and are only parsed the first time they are
+asked for, so importing this module costs next to nothing. pandas is likewise
+only imported when the labelled splits are written out as CSV.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+
+@lru_cache(maxsize=None)
+def _read_jsonl(name):
+    with open(DATA_DIR / f"{name}.jsonl", encoding="utf-8") as f:
+        return tuple(json.loads(line) for line in f if line.strip())
+
+
+def load_funny_jokes():
+    """Stand-up one-liners (topic, joke, comedian)."""
+    return [dict(row) for row in _read_jsonl("funny_jokes")]
+
+
+def load_not_funny_jokes():
+    """Pun-style jokes (topic, joke) used as the negative class."""
+    return [dict(row) for row in _read_jsonl("not_funny_jokes")]
+
+
+def labelled_jokes(seed=None):
+    """Return shuffled ``(jokes, labels)`` with 1 = funny and 0 = not funny."""
+    import random
+
+    funny_jokes = load_funny_jokes()
+    not_funny_jokes = load_not_funny_jokes()
+    combined = list(zip(funny_jokes + not_funny_jokes, [1] * len(funny_jokes) + [0] * len(not_funny_jokes)))
+    random.Random(seed).shuffle(combined)
+    jokes, labels = zip(*combined)
+    return list(jokes), list(labels)
+
+
+def write_splits(directory=".", seed=None, train=0.7, test=0.15):
+    """Split the labelled jokes into train/test/dev CSVs and return the three DataFrames."""
+    import pandas as pd
+
+    jokes, labels = labelled_jokes(seed)
+
+    # calculate split indices
+    train_split = int(train * len(jokes))
+    test_split = int((train + test) * len(jokes))
+
+    frames = []
+    for name, start, end in [("train", 0, train_split), ("test", train_split, test_split), ("dev", test_split, None)]:
+        df = pd.DataFrame({
+            "topic": [joke["topic"] for joke in jokes[start:end]],
+            "joke": [joke["joke"] for joke in jokes[start:end]],
+            "label": labels[start:end]
+        })
+        df.to_csv(Path(directory) / f"{name}.csv", index=False)
+        frames.append(df)
+    return tuple(frames)
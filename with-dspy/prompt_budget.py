@@ -0,0 +1,267 @@
+"""Keep prompts inside a token budget.
+
+``BootstrapFewShotWithRandomSearch(max_bootstrapped_demos=8, max_labeled_demos=16)``
+can put two dozen demos in every call, instruction mutators keep growing their
+text, and hand-written few-shot prompts like ``examples_prompt`` only get longer.
+Input tokens drive latency on CPU-bound local models, so this module:
+
+- counts tokens per prompt section (tiktoken when installed, ~4 chars/token otherwise),
+- drops near-identical demos (word-shingle Jaccard similarity),
+- keeps the most useful demos that fit the budget,
+- strips repeated sentences from instructions and caps their length,
+- reports the tokens saved for every candidate it compresses.
+
+    report = compress_program(compiled_program, max_tokens=1500)
+    print(report)
+
+    reports = compress_candidates(cot_compiled.candidate_programs, max_tokens=1500)
+"""
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text):
+    enc = _encoding()
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text))
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", text.lower())).strip()
+
+
+def shingles(text, k=3):
+    words = _normalize(text).split()
+    if len(words) < k:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def similarity(a, b):
+    """Jaccard similarity of two shingle sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class BudgetReport:
+    name: str = "prompt"
+    sections_before: dict = field(default_factory=dict)
+    sections_after: dict = field(default_factory=dict)
+    demos_before: int = 0
+    demos_after: int = 0
+    duplicates_dropped: int = 0
+
+    @property
+    def tokens_before(self):
+        return sum(self.sections_before.values())
+
+    @property
+    def tokens_after(self):
+        return sum(self.sections_after.values())
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_before - self.tokens_after
+
+    def merge(self, other):
+        for attr in ("sections_before", "sections_after"):
+            for key, value in getattr(other, attr).items():
+                getattr(self, attr)[f"{other.name}.{key}"] = value
+        self.demos_before += other.demos_before
+        self.demos_after += other.demos_after
+        self.duplicates_dropped += other.duplicates_dropped
+
+    def __str__(self):
+        lines = [f"{self.name}: {self.tokens_before} -> {self.tokens_after} tokens "
+                 f"(saved {self.tokens_saved}), demos {self.demos_before} -> {self.demos_after} "
+                 f"({self.duplicates_dropped} near-duplicates)"]
+        for key, before in self.sections_before.items():
+            lines.append(f"  {key:<30}{before:>8}{self.sections_after.get(key, 0):>8}")
+        return "\n".join(lines)
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])(\s+|(?<=[a-z\d][.!?])(?=[A-Z]))")
+
+
+def compress_instructions(text, max_tokens=None):
+    """Drop repeated sentences and, if still over ``max_tokens``, trailing sentences.
+
+    Sentences end at ``.``, ``!`` or ``?`` followed by whitespace, or directly
+    by a capital after a lower-case word, as in text pasted twice
+    ("...transactions.Determine..."). "gpt-3.5", "e.g." and "U.S." stay intact,
+    and the kept sentences keep their original separators. ``text`` comes back
+    unchanged when nothing is dropped.
+    """
+    pieces = _SENTENCE_END.split(text)
+    sentences = list(zip([""] + pieces[1::2], pieces[0::2]))  # (separator before, sentence)
+    kept, seen = [], set()
+    for separator, sentence in sentences:
+        key = _normalize(sentence)
+        if key and key in seen:
+            continue
+        seen.add(key)
+        kept.append((separator, sentence))
+
+    def join(parts):
+        return parts[0][1] + "".join(separator + sentence for separator, sentence in parts[1:])
+
+    while max_tokens is not None and len(kept) > 1 and count_tokens(join(kept)) > max_tokens:
+        kept.pop()
+    return text if len(kept) == len(sentences) else join(kept)
+
+
+def select_demos(demos, render, max_tokens, utility=None, dedupe_threshold=0.8):
+    """Pick demos to fit ``max_tokens``.
+
+    ``render(demo)`` gives the text the demo adds to the prompt. Near-duplicates
+    (similarity >= ``dedupe_threshold``) of an earlier demo are dropped first.
+    The rest are ranked by ``utility(demo)`` (higher is better; defaults to
+    input order) per token and added greedily until the budget is spent. The
+    kept demos keep their original order. Returns ``(kept, duplicates_dropped)``.
+    """
+    unique, seen = [], []
+    for i, demo in enumerate(demos):
+        text = render(demo)
+        sh = shingles(text)
+        if any(similarity(sh, other) >= dedupe_threshold for other in seen):
+            continue
+        seen.append(sh)
+        unique.append((i, demo, count_tokens(text)))
+    duplicates = len(demos) - len(unique)
+
+    if utility is None:
+        ranked = unique
+    else:
+        ranked = sorted(unique, key=lambda x: utility(x[1]) / max(x[2], 1), reverse=True)
+    kept, used = [], 0
+    for i, demo, tokens in ranked:
+        if used + tokens <= max_tokens:
+            kept.append((i, demo))
+            used += tokens
+    return [demo for _, demo in sorted(kept, key=lambda x: x[0])], duplicates
+
+
+def compress_sections(sections, max_tokens, demo_section="examples", render=str, utility=None,
+                      dedupe_threshold=0.8, instructions_section="instructions", instruction_tokens=None,
+                      name="prompt"):
+    """Fit a prompt given as ``{section: text or list of demos}`` into ``max_tokens``.
+
+    Fixed sections are kept as they are, except the instructions, which are
+    deduplicated and capped at ``instruction_tokens`` (by default, whatever the
+    other fixed sections leave of ``max_tokens``). The demo section gets
+    whatever budget is left. Raises ``ValueError`` if the fixed sections alone
+    don't fit. Returns ``(sections, report)``.
+    """
+    report = BudgetReport(name=name)
+    out = {}
+    for key, value in sections.items():
+        if key == demo_section:
+            report.sections_before[key] = sum(count_tokens(render(d)) for d in value)
+            report.demos_before = len(value)
+        else:
+            report.sections_before[key] = count_tokens(value)
+    if instruction_tokens is None:
+        fixed = sum(tokens for key, tokens in report.sections_before.items()
+                    if key not in (demo_section, instructions_section))
+        instruction_tokens = max(max_tokens - fixed, 0)
+    for key, value in sections.items():
+        if key == demo_section:
+            continue
+        if key == instructions_section:
+            value = compress_instructions(value, instruction_tokens)
+        out[key] = value
+        report.sections_after[key] = count_tokens(value)
+    if sum(report.sections_after.values()) > max_tokens:
+        raise ValueError(f"{name}: the fixed sections take {sum(report.sections_after.values())} tokens, "
+                         f"over the budget of {max_tokens}")
+
+    if demo_section in sections:
+        remaining = max(max_tokens - sum(report.sections_after.values()), 0)
+        demos, report.duplicates_dropped = select_demos(
+            sections[demo_section], render, remaining, utility, dedupe_threshold
+        )
+        out[demo_section] = demos
+        report.demos_after = len(demos)
+        report.sections_after[demo_section] = sum(count_tokens(render(d)) for d in demos)
+    return {key: out[key] for key in sections}, report
+
+
+# --- DSPy ----------------------------------------------------------------
+
+
+def _demo_fields(demo):
+    data = demo.toDict() if hasattr(demo, "toDict") else dict(demo)
+    data.pop("augmented", None)
+    return data
+
+
+def render_demo(demo):
+    return "\n".join(f"{key}: {value}" for key, value in _demo_fields(demo).items())
+
+
+def _signature(predictor):
+    return getattr(predictor, "extended_signature", None) or predictor.signature
+
+
+def _bootstrapped_first(demo):
+    # bootstrapped demos carry the teacher's reasoning, so they are worth more per token
+    data = demo.toDict() if hasattr(demo, "toDict") else dict(demo)
+    return 2.0 if data.get("augmented") else 1.0
+
+
+def compress_program(program, max_tokens, instruction_tokens=None, utility=_bootstrapped_first,
+                     dedupe_threshold=0.8, name="program"):
+    """Compress the instructions and demos of every predictor in a DSPy program in place.
+
+    ``max_tokens`` is the budget for the fixed part of each call (instructions
+    plus demos); the live inputs come on top. Instructions are trimmed to fit
+    it unless ``instruction_tokens`` caps them separately.
+    """
+    report = BudgetReport(name=name)
+    for predictor_name, predictor in program.named_predictors():
+        signature = _signature(predictor)
+        instructions = signature.instructions
+        sections, predictor_report = compress_sections(
+            {"instructions": instructions, "examples": list(predictor.demos)},
+            max_tokens,
+            render=render_demo,
+            utility=utility,
+            dedupe_threshold=dedupe_threshold,
+            instruction_tokens=instruction_tokens,
+            name=predictor_name,
+        )
+        if sections["instructions"] != instructions:
+            new_signature = signature.with_instructions(sections["instructions"])
+            if hasattr(predictor, "extended_signature"):
+                predictor.extended_signature = new_signature
+            else:
+                predictor.signature = new_signature
+        predictor.demos = sections["examples"]
+        report.merge(predictor_report)
+    return report
+
+
+def compress_candidates(candidates, max_tokens, **kwargs):
+    """Compress every candidate program of a random-search optimizer and report savings for each.
+
+    Accepts plain programs or the ``(score, subscores, seed, program)`` tuples
+    that ``BootstrapFewShotWithRandomSearch`` keeps in ``candidate_programs``.
+    """
+    reports = []
+    for i, candidate in enumerate(candidates):
+        program = candidate[-1] if isinstance(candidate, tuple) else candidate
+        reports.append(compress_program(program, max_tokens, name=f"candidate {i}", **kwargs))
+    return reports